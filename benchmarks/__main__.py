@@ -0,0 +1,104 @@
+""" Minimal runner for the benchmarks without asv
+
+Runs the benchmarks of all bench_*.py modules (asv conventions: classes
+with setup/teardown, params and time_*, timeraw_* and track_* methods)
+and prints the best of several runs.
+
+Usage: python -m benchmarks [-b PATTERN] [--max-size N] [--repeat N]
+
+The full suite with history and regression detection runs with asv
+(configuration in asv.conf.json): asv run / asv continuous master HEAD
+
+Other than asv, this runner benchmarks the working tree: the repository
+folder is put in front of PYTHONPATH, also for the benchmarks which start
+a new interpreter.
+"""
+
+import argparse
+import importlib
+import itertools
+import logging
+import os
+import re
+import subprocess
+import sys
+import timeit
+
+REPOPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RAW_TEMPLATE = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def run_benchmark(instance, method_name, args, repeat):
+    method = getattr(instance, method_name)
+    if method_name.startswith('track_'):
+        return method(*args), getattr(method, 'unit', '')
+    if method_name.startswith('timeraw_'):
+        code = RAW_TEMPLATE.format(code=method(*args))
+        return min(float(subprocess.check_output(
+            [sys.executable, '-c', code]).decode().split()[-1])
+            for _ in range(repeat)), 's'
+    return min(timeit.repeat(lambda: method(*args), number=1,
+                             repeat=repeat)), 's'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('-b', '--bench', default='',
+                        help='regex for the benchmark names to run')
+    parser.add_argument('--max-size', type=int, default=None,
+                        help='skip parameter sizes above this number')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    os.environ['PYTHONPATH'] = os.pathsep.join(
+        [REPOPATH] + [path for path in
+                      os.environ.get('PYTHONPATH', '').split(os.pathsep)
+                      if path])
+    benchpath = os.path.join(REPOPATH, 'benchmarks')
+
+    for module_file in sorted(os.listdir(benchpath)):
+        if not (module_file.startswith('bench_') and
+                module_file.endswith('.py')):
+            continue
+        module = importlib.import_module('benchmarks.' + module_file[:-3])
+        for cls_name, cls in sorted(vars(module).items()):
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            params = getattr(cls, 'params', [])
+            for method_name in sorted(vars(cls)):
+                if not method_name.startswith(('time_', 'timeraw_',
+                                               'track_')):
+                    continue
+                name = '{}.{}.{}'.format(module_file[:-3], cls_name,
+                                         method_name)
+                if not re.search(args.bench, name):
+                    continue
+                for para in itertools.product(*params):
+                    if args.max_size and any(
+                            isinstance(val, int) and val > args.max_size
+                            for val in para):
+                        continue
+                    instance = cls()
+                    if hasattr(instance, 'setup'):
+                        instance.setup(*para)
+                    try:
+                        value, unit = run_benchmark(instance, method_name,
+                                                    para, args.repeat)
+                    finally:
+                        if hasattr(instance, 'teardown'):
+                            instance.teardown(*para)
+                    if unit == 's':
+                        value, unit = value * 1e3, 'ms'
+                    print('{:<70} {:>12.3f} {}'.format(
+                        name + ('({})'.format(', '.join(map(str, para)))
+                                if para else ''), value, unit))
+
+
+if __name__ == '__main__':
+    main()
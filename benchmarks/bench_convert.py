@@ -0,0 +1,49 @@
+""" Conversion of name lists of different size and source classification
+
+Except for time_convert_warm_cache, the converters do not keep resolved
+names between calls (cache_size=0), so every call matches all distinct
+names.
+"""
+
+from .common import SIZES, sample_names
+
+import country_converter as coco
+
+
+class Convert():
+    params = [SIZES, ['ISO3', 'ISOnumeric', 'regex']]
+    param_names = ['size', 'src']
+    timeout = 300
+
+    def setup(self, size, src):
+        self.names = sample_names(src, size)
+        self.converter = coco.CountryConverter(cache_size=0)
+        self.warm_converter = coco.CountryConverter()
+        self.warm_converter.convert(self.names, src=src, to='ISO2')
+
+    def time_convert(self, size, src):
+        self.converter.convert(self.names, src=src, to='ISO2')
+
+    def time_convert_detect_src(self, size, src):
+        self.converter.convert(self.names, to='ISO2')
+
+    def time_convert_warm_cache(self, size, src):
+        self.warm_converter.convert(self.names, src=src, to='ISO2')
+
+
+class ConvertSeries():
+    params = [SIZES]
+    param_names = ['size']
+    timeout = 300
+
+    def setup(self, size):
+        import pandas as pd
+        self.series = pd.Series(sample_names('regex', size))
+        self.converter = coco.CountryConverter(cache_size=0)
+
+    def time_convert_series(self, size):
+        self.converter.convert_series(self.series, to='ISO3')
+
+    def time_convert_series_categorical(self, size):
+        self.converter.convert_series(self.series, to='continent',
+                                      categorical=True)
@@ -0,0 +1,39 @@
+""" Matching of two name lists and regex matching of single names """
+
+from .common import sample_names, vocabulary
+
+import country_converter as coco
+
+
+class Match():
+    params = [[1000, 100000]]
+    param_names = ['size']
+    timeout = 300
+
+    def setup(self, size):
+        self.list_a = sample_names('regex', size, seed=1)
+        self.list_b = vocabulary('name_short')
+        coco.reset_default_converter()
+        self.converter = coco.get_default_converter()
+
+    def time_match(self, size):
+        self.converter.cache_clear()
+        coco.match(self.list_a, self.list_b)
+
+
+class RegexMatching():
+    """ Regex search per name, with and without literal prefilter """
+
+    def setup(self):
+        self.names = vocabulary('regex')
+        self.converter = coco.CountryConverter()
+        self.regexes = self.converter.regexes
+
+    def time_full_scan(self):
+        for name in self.names:
+            [ind for ind, regex in enumerate(self.regexes)
+             if regex.search(name)]
+
+    def time_prefiltered(self):
+        for name in self.names:
+            self.converter._search_regexes(name)
@@ -0,0 +1,78 @@
+""" Import, instantiation and command line interface
+
+The timeraw benchmarks return code which is timed in a fresh
+interpreter.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .common import sample_names
+
+import country_converter as coco
+
+
+class Startup():
+
+    def setup(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.old_cache_dir = os.environ.get('COCO_CACHE_DIR')
+        os.environ['COCO_CACHE_DIR'] = self.cache_dir
+        coco.build_cache()
+
+    def teardown(self):
+        if self.old_cache_dir is None:
+            del os.environ['COCO_CACHE_DIR']
+        else:
+            os.environ['COCO_CACHE_DIR'] = self.old_cache_dir
+        shutil.rmtree(self.cache_dir)
+
+    def time_init_tsv(self):
+        coco.CountryConverter(use_cache=False)
+
+    def time_init_cached(self):
+        coco.CountryConverter()
+
+    def timeraw_import(self):
+        return 'import country_converter'
+
+    def timeraw_import_and_convert(self):
+        return ('import country_converter as coco\n'
+                'coco.convert(["Austria", "DE", "840"], to="ISO3")')
+
+    def timeraw_cli(self):
+        return ('import sys\n'
+                'sys.argv = ["coco", "Austria", "DE", "United States"]\n'
+                'from country_converter.country_converter import main\n'
+                'main()')
+
+    def track_pandas_imported(self):
+        return int(subprocess.check_output(
+            [sys.executable, '-c',
+             'import sys, country_converter; '
+             'print(int("pandas" in sys.modules))']))
+    track_pandas_imported.unit = 'bool'
+
+
+class CLI():
+    params = [[1000, 100000]]
+    param_names = ['size']
+    timeout = 300
+
+    def setup(self, size):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.tmp_dir, 'names.txt')
+        with open(self.input_file, 'w', encoding='utf-8') as names_file:
+            names_file.write('\n'.join(sample_names('regex', size)))
+
+    def teardown(self, size):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_cli_stream(self, size):
+        subprocess.check_output(
+            [sys.executable, '-c',
+             'from country_converter.country_converter import main; '
+             'main()', '--input', self.input_file, '--to', 'ISO2'])
@@ -0,0 +1,49 @@
+""" Synthetic workloads for the benchmarks
+
+The names are drawn from the country data (short and official names,
+codes) and the alternative names of the regex test files. Real inputs
+repeat a few hundred names very often, so the names are sampled with
+Zipf distributed frequencies (with a fixed seed).
+"""
+
+import os
+
+import numpy as np
+
+from country_converter.country_converter import (
+    COUNTRY_DATA_FILE, _read_data_file)
+
+BENCHPATH = os.path.dirname(os.path.abspath(__file__))
+REPOPATH = os.path.dirname(BENCHPATH)
+TESTPATH = os.path.join(REPOPATH, 'tests')
+
+SIZES = [1000, 100000, 1000000]
+
+
+def vocabulary(src):
+    """ Distinct names in classification src
+
+    For src 'regex' these are the short and official names of the country
+    data and the names of the regex test files, otherwise the entries of
+    the column src.
+    """
+    data = _read_data_file(COUNTRY_DATA_FILE)
+    if src != 'regex':
+        return sorted(set(str(code) for code in data[src]
+                          if code is not None))
+    names = data['name_short'] + data['name_official']
+    for test_file in sorted(os.listdir(TESTPATH)):
+        if test_file.startswith('test_regex') and test_file.endswith('.txt'):
+            names += _read_data_file(
+                os.path.join(TESTPATH, test_file))['name_test']
+    return sorted(set(name for name in names if name is not None))
+
+
+def sample_names(src, size, seed=1):
+    """ List of size names in classification src, with repetitions """
+    names = np.array(vocabulary(src), dtype=object)
+    random = np.random.RandomState(seed)
+    weights = 1 / np.arange(1, len(names) + 1)
+    order = random.permutation(len(names))
+    return names[order][random.choice(
+        len(names), size=size, p=weights / weights.sum())].tolist()
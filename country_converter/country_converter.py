@@ -4,18 +4,95 @@
 """
 
 import argparse
+import collections
+import collections.abc
+import csv
+import hashlib
+import itertools
+import json
 import logging
 import os
+import pickle
+import random
 import re
-import pandas as pd
+import sys
+import threading
+import time
+import weakref
+import numpy as np
+
+try:
+    from re import _parser as sre_parse
+except ImportError:     # python < 3.11
+    import sre_parse
+
 from country_converter.version import __version__
 
 COUNTRY_DATA_FILE = os.path.join(
     os.path.split(os.path.abspath(__file__))[0], 'country_data.tsv')
 
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+# Bump if the content of the cached data artifact changes
+_ARTIFACT_FORMAT = 3
+
+# Columns without duplicates in the merged data (last entry is kept)
+_MUST_BE_UNIQUE = ['name_short', 'name_official', 'regex']
+
+# Code indexes included in the cached data artifact
+_PREBUILT_INDEXES = ['ISO2', 'ISO3', 'ISOnumeric', 'UNcode']
+
+# Classifications detected for src=None (first one wins for equal codes)
+_DETECTED_FORMATS = ['ISO3', 'ISO2', 'ISOnumeric', 'UNcode']
+
+
+def _pandas():
+    """ Imports pandas on demand
+
+    pandas is only needed for DataFrame in- and output, the conversions
+    work without it (which keeps the import of coco fast).
+    """
+    import pandas as pd
+    register_pandas_accessors()
+    return pd
+
+
+def _is_dataframe(data):
+    """ True if data is a pandas DataFrame (without importing pandas) """
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+
+def _read_data_file(data_file):
+    """ Reads a country data file (utf-8 encoded, tab separated)
+
+    Returns
+    -------
+
+    OrderedDict : column name (from the header) -> list of str values,
+        missing values as None
+    """
+    with open(data_file, encoding='utf-8', newline='') as df:
+        rows = csv.reader(df, delimiter='\t')
+        header = next(rows)
+        values = [[] for _ in header]
+        for line_nr, row in enumerate(rows, start=2):
+            if not row:
+                continue
+            if len(row) > len(header):
+                raise ValueError(
+                    'Line {} of {} has {} fields, expected {}'.format(
+                        line_nr, data_file, len(row), len(header)))
+            row = row + [''] * (len(header) - len(row))
+            for column, value in zip(values, row):
+                column.append(value or None)
+    return collections.OrderedDict(zip(header, values))
+
 
 def match(list_a, list_b, not_found='not_found', enforce_sublist=False,
-          country_data=COUNTRY_DATA_FILE, additional_data=None):
+          country_data=COUNTRY_DATA_FILE, additional_data=None, n_jobs=1,
+          diagnostics=False):
     """ Matches the country names given in two lists into a dictionary.
 
     This function matches names given in list_a to the one provided in list_b
@@ -46,6 +123,15 @@ def match(list_a, list_b, not_found='not_found', enforce_sublist=False,
          country_data_file. (utf-8 encoded tab separated data, same
          column headers in all files)
 
+    n_jobs : int, optional
+        Number of processes for identifying the names in list_a and list_b,
+        see CountryConverter.convert (default: 1)
+
+    diagnostics : boolean, optional
+        If True, a report of the not found and ambiguous names is returned
+        as well (default: False). Independent of this, these names are
+        logged in one line per call.
+
     Returns
     -------
     dict:
@@ -54,59 +140,126 @@ def match(list_a, list_b, not_found='not_found', enforce_sublist=False,
         a 1:1 correspondence, the value is a str (if enforce_sublist is False),
         otherwise multiple entries as list.
 
+    With diagnostics, a tuple (dict, report) with the report dict
+    containing 'names' and 'unique_names' (of list_a), the names per kind
+    of issue (name -> detail) for 'not_found_a', 'multiple_matches_a'
+    (detail: the matching regexes), 'not_found_b' and 'multiple_matches_b'
+    (detail: the matching names of list_b) and 'counts', the number of
+    entries of list_a per kind of issue.
+
     """
-    if isinstance(list_a, str):
-        list_a = [list_a]
-    if isinstance(list_b, str):
-        list_b = [list_b]
-    if isinstance(list_a, tuple):
-        list_a = list(list_a)
-    if isinstance(list_b, tuple):
-        list_b = list(list_b)
+    list_a, list_b = _as_list(list_a), _as_list(list_b)
+    coco = get_default_converter(country_data, additional_data)
 
-    coco = CountryConverter(country_data, additional_data)
+    rows_a, rows_b = [
+        {name: row_ids for name, (_, _, row_ids) in zip(
+            unique, coco._match_names(unique, 'regex', [], n_jobs))}
+        for unique in (list(collections.OrderedDict.fromkeys(list_a)),
+                       list(collections.OrderedDict.fromkeys(list_b)))]
+
+    return _finish_match(coco, list_a, list_b, rows_a, rows_b, not_found,
+                         enforce_sublist, diagnostics)
+
+
+async def amatch(list_a, list_b, not_found='not_found', enforce_sublist=False,
+                 country_data=COUNTRY_DATA_FILE, additional_data=None,
+                 executor=None, diagnostics=False):
+    """ Asyncio version of match
+
+    Names already known to the shared converter are resolved
+    directly, the others are matched in executor (see
+    CountryConverter.aconvert). Parameters and return value as for match,
+    except
+
+    executor : concurrent.futures.Executor, optional
+        Executor for the matching, default: the default executor of the
+        event loop
+
+    """
+    list_a, list_b = _as_list(list_a), _as_list(list_b)
+    coco = get_default_converter(country_data, additional_data)
+
+    rows_a, rows_b = dict(), dict()
+    for names, rows in [(list_a, rows_a), (list_b, rows_b)]:
+        unique = list(collections.OrderedDict.fromkeys(names))
+        matches = await coco._amatch_names(unique, 'regex', [], executor)
+        rows.update((name, row_ids)
+                    for name, (_, _, row_ids) in zip(unique, matches))
+
+    return _finish_match(coco, list_a, list_b, rows_a, rows_b, not_found,
+                         enforce_sublist, diagnostics)
+
+
+def _finish_match(coco, list_a, list_b, rows_a, rows_b, not_found,
+                  enforce_sublist, diagnostics):
+    """ Joins the lists and reports the issues (see match) """
+    issues = _Diagnostics(['not_found_a', 'multiple_matches_a',
+                           'not_found_b', 'multiple_matches_b'])
+    name_dict_a = _match_lists(list_a, list_b, rows_a, rows_b, not_found,
+                               enforce_sublist, issues, coco._regex_patterns)
+    issues.log('match', len(rows_a))
+    if not diagnostics:
+        return name_dict_a
+    counts = collections.Counter(list_a) if issues else collections.Counter()
+    return name_dict_a, issues.report(len(list_a), len(rows_a),
+                                      counts.__getitem__)
+
+
+def _as_list(names):
+    """ Passed names (str, tuple or list) as list """
+    if isinstance(names, str):
+        return [names]
+    if isinstance(names, tuple):
+        return list(names)
+    return names
+
+
+def _match_lists(list_a, list_b, rows_a, rows_b, not_found,
+                 enforce_sublist, diagnostics, patterns):
+    """ Matches list_a to list_b based on the matched rows of both lists
+
+    The names of list_b are indexed by their matching rows of the country
+    data, the names of list_a are then joined on their matching rows.
+    See match for the parameters; rows_a and rows_b give the matching
+    row ids for every name in list_a and list_b, respectively. Not found
+    and ambiguous names are added to the _Diagnostics diagnostics,
+    patterns are the regexes of the rows.
+    """
+    names_b_by_row = dict()
+    for name_b in list_b:
+        for row_id in rows_b[name_b]:
+            names_b_by_row.setdefault(row_id, []).append(name_b)
 
     name_dict_a = dict()
-    match_dict_a = dict()
 
-    for name_a in list_a:
+    for name_a in collections.OrderedDict.fromkeys(list_a):
 
         name_dict_a[name_a] = []
-        match_dict_a[name_a] = []
-
-        for regex in coco.regexes:
-            if regex.search(name_a):
-                match_dict_a[name_a].append(regex)
 
-        if len(match_dict_a[name_a]) == 0:
-            logging.warning('Could not identify {} in list_a'.format(name_a))
+        if len(rows_a[name_a]) == 0:
+            diagnostics.add('not_found_a', name_a, 'regex')
             _not_found_entry = name_a if not not_found else not_found
             name_dict_a[name_a].append(_not_found_entry)
             if not enforce_sublist:
                 name_dict_a[name_a] = name_dict_a[name_a][0]
             continue
 
-        if len(match_dict_a[name_a]) > 1:
-            logging.warning(
-                'Multiple matches for name {} in list_a'.format(name_a))
+        if len(rows_a[name_a]) > 1:
+            diagnostics.add('multiple_matches_a', name_a,
+                            tuple(patterns[row] for row in rows_a[name_a]))
 
-        for match_case in match_dict_a[name_a]:
-            b_matches = 0
-            for name_b in list_b:
-                if match_case.search(name_b):
-                    b_matches += 1
-                    name_dict_a[name_a].append(name_b)
+        for row_id in rows_a[name_a]:
+            name_dict_a[name_a].extend(names_b_by_row.get(row_id, []))
+        b_matches = len(name_dict_a[name_a])
 
         if b_matches == 0:
-            logging.warning(
-                'Could not find any '
-                'correspondence for {} in list_b'.format(name_a))
+            diagnostics.add('not_found_b', name_a)
             _not_found_entry = name_a if not not_found else not_found
             name_dict_a[name_a].append(_not_found_entry)
 
         if b_matches > 1:
-            logging.warning('Multiple matches for '
-                            'name {} in list_b'.format(name_a))
+            diagnostics.add('multiple_matches_b', name_a,
+                            tuple(name_dict_a[name_a]))
 
         if not enforce_sublist and (len(name_dict_a[name_a]) == 1):
             name_dict_a[name_a] = name_dict_a[name_a][0]
@@ -117,10 +270,10 @@ def match(list_a, list_b, not_found='not_found', enforce_sublist=False,
 def convert(*args, **kargs):
     """ Wraper around CountryConverter.convert()
 
-    Uses the same paramter. This function has the same performance as
-    CountryConverter.convert for one call; for multiple calls its better to
-    instantiate a common CountryConverter (this avoid loading the source data
-    file multiple times).
+    Uses the same paramter. The conversion is done by a shared
+    CountryConverter (see get_default_converter), which is created on the
+    first call for the given country_data/additional_data and reused
+    afterwards.
 
     Note
     ----
@@ -138,9 +291,10 @@ def convert(*args, **kargs):
     src : str, optional
         Source classification
 
-    to : str, optional
+    to : str or list of str, optional
         Output classification (valid str for an index of
-        country_data.txt), default: name_short
+        country_data.txt), default: name_short. For a list of
+        classifications, each name is converted to a tuple.
 
     enforce_list : boolean, optional
         If True, enforces the output to be list (if only one name was passed)
@@ -169,11 +323,798 @@ def convert(*args, **kargs):
 
     """
     init = {'country_data': COUNTRY_DATA_FILE, 'additional_data': None}
-    init.update({kk: kargs.get(kk) for kk in init.keys() if kk in kargs})
-    coco = CountryConverter(**init)
+    init.update({kk: kargs.pop(kk) for kk in list(init.keys())
+                 if kk in kargs})
+    coco = get_default_converter(**init)
     return coco.convert(*args, **kargs)
 
 
+_DEFAULT_CONVERTERS = collections.OrderedDict()
+_DEFAULT_CONVERTERS_LOCK = threading.Lock()
+
+# Number of shared converters kept for different data
+_MAX_DEFAULT_CONVERTERS = 8
+
+
+def _data_key(data):
+    """ Key of country_data/additional_data for the shared converters
+
+    Files are identified by their path, dataframes by their identity.
+    """
+    if isinstance(data, (list, tuple)):
+        return tuple(_data_key(entry) for entry in data)
+    if data is None or isinstance(data, str):
+        return data
+    return id(data)
+
+
+def get_default_converter(country_data=COUNTRY_DATA_FILE,
+                          additional_data=None):
+    """ Shared CountryConverter for the given data
+
+    The converter is created on the first call and reused by all later
+    calls with the same data (files with the same path, the same
+    dataframe objects). The module level functions convert and match use
+    these converters. Changes to the data files or dataframes after the
+    first call are not picked up - use reset_default_converter in that
+    case.
+
+    Parameters
+    ----------
+
+    country_data : pandas dataframe or path to data file (optional)
+        This is by default set to COUNTRY_DATA_FILE - the standard (tested)
+        country list for coco.
+
+    additional_data: (list of) pandas dataframes or data files (optional)
+        Additional data to include, see CountryConverter
+
+    Returns
+    -------
+
+    CountryConverter
+    """
+    key = (_data_key(country_data), _data_key(additional_data))
+    with _DEFAULT_CONVERTERS_LOCK:
+        try:
+            # the data is kept with the converter, so that the ids of
+            # dataframes in the key can not be reused by other objects
+            _, coco = _DEFAULT_CONVERTERS[key]
+            _DEFAULT_CONVERTERS.move_to_end(key)
+            return coco
+        except KeyError:
+            pass
+        coco = CountryConverter(country_data, additional_data)
+        _DEFAULT_CONVERTERS[key] = ((country_data, additional_data), coco)
+        while len(_DEFAULT_CONVERTERS) > _MAX_DEFAULT_CONVERTERS:
+            _DEFAULT_CONVERTERS.popitem(last=False)
+        return coco
+
+
+def reset_default_converter():
+    """ Discards the shared converters (see get_default_converter)
+    """
+    with _DEFAULT_CONVERTERS_LOCK:
+        _DEFAULT_CONVERTERS.clear()
+
+
+def get_cache_dir():
+    """ Directory for the cached data artifacts of coco
+
+    This is the environment variable COCO_CACHE_DIR if set, otherwise
+    country_converter in the user cache directory (XDG_CACHE_HOME or
+    ~/.cache).
+    """
+    cache_dir = os.environ.get('COCO_CACHE_DIR')
+    if not cache_dir:
+        cache_dir = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'),
+            'country_converter')
+    return cache_dir
+
+
+def _artifact_path(data_files):
+    """ Path of the cached data artifact for the given data files
+
+    The name of the artifact contains the package version, the artifact
+    format and a hash of the content of all data files.
+
+    Parameters
+    ----------
+
+    data_files : list
+        Country data followed by the additional data
+
+    Returns
+    -------
+
+    str or None (if any of the data is not a file)
+    """
+    if not all(isinstance(data, str) for data in data_files):
+        return None
+    data_hash = hashlib.sha256(
+        '{}-{}'.format(__version__, _ARTIFACT_FORMAT).encode('utf-8'))
+    for data_file in data_files:
+        with open(data_file, 'rb') as df:
+            data_hash.update(hashlib.sha256(df.read()).digest())
+    return os.path.join(get_cache_dir(), '{}{}.pickle'.format(
+        _artifact_prefix(), data_hash.hexdigest()[:32]))
+
+
+def _artifact_prefix():
+    """ Common start of the names of the artifacts of this version """
+    return 'country_data_{}_{}_'.format(__version__, _ARTIFACT_FORMAT)
+
+
+def _prune_artifacts(cache_dir):
+    """ Removes the artifacts of other package versions or formats
+
+    Returns
+    -------
+
+    list : paths of the removed artifacts
+    """
+    removed = []
+    try:
+        artifacts = os.listdir(cache_dir)
+    except OSError:
+        return removed
+    for artifact in artifacts:
+        if (not artifact.startswith('country_data_') or
+                not artifact.endswith('.pickle') or
+                artifact.startswith(_artifact_prefix())):
+            continue
+        path = os.path.join(cache_dir, artifact)
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as excep:
+            logging.debug('Could not remove cached data {}: {}'.format(
+                path, excep))
+    return removed
+
+
+def _load_artifact(path):
+    """ Loads a cached data artifact, returns None if not available
+
+    Artifacts which are not owned by the current user or writable by
+    others are not loaded (on POSIX systems).
+    """
+    try:
+        with open(path, 'rb') as af:
+            if hasattr(os, 'getuid'):
+                af_stat = os.fstat(af.fileno())
+                if (af_stat.st_uid != os.getuid() or
+                        af_stat.st_mode & 0o022):
+                    logging.debug('Cached data {} is not loaded: not owned '
+                                  'by the user or writable by others'.format(
+                                      path))
+                    return None
+            state = pickle.load(af)
+        if state.get('format') != _ARTIFACT_FORMAT:
+            return None
+        return state
+    except FileNotFoundError:
+        return None
+    except Exception as excep:
+        logging.debug('Could not load cached data {}: {}'.format(
+            path, excep))
+        return None
+
+
+def _write_artifact(path, state):
+    """ Writes a cached data artifact, returns True if successful """
+    import tempfile
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as af:
+            pickle.dump(state, af, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as excep:
+        logging.debug('Could not write cached data {}: {}'.format(
+            path, excep))
+        return False
+
+
+def build_cache(country_data=COUNTRY_DATA_FILE, additional_data=None):
+    """ Builds the cached data artifact for the given data files
+
+    A CountryConverter instantiated with these data files then loads the
+    validated data and lookup indexes from the artifact instead of
+    reading the files. The artifact is only written by this function
+    (e.g. during deployment); artifacts of other package versions or
+    artifact formats in the cache directory are removed.
+
+    Parameters
+    ----------
+
+    country_data : path to data file (optional)
+        This is by default set to COUNTRY_DATA_FILE - the standard (tested)
+        country list for coco.
+
+    additional_data: (list of) data files (optional)
+        Additional data files, see CountryConverter
+
+    Returns
+    -------
+
+    str : path of the artifact or None if it could not be written
+    """
+    if additional_data is None:
+        additional_data = []
+    if not isinstance(additional_data, list):
+        additional_data = [additional_data]
+    path = _artifact_path([country_data] + additional_data)
+    if path is None:
+        raise TypeError('Cached data can only be built for data files')
+    coco = CountryConverter(country_data, additional_data, use_cache=False)
+    _prune_artifacts(os.path.dirname(path))
+    return path if _write_artifact(path, coco._get_state()) else None
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+Concordance = collections.namedtuple(
+    'Concordance', ['matrix', 'src_labels', 'to_labels'])
+
+
+Exclusion = collections.namedtuple('Exclusion', ['name', 'excluded'])
+
+
+class _LRUCache():
+    """ Bounded, thread-safe least recently used cache
+
+    Parameters
+    ----------
+
+    maxsize : int
+        Maximum number of entries, 0 disables the cache
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions,
+                             self.maxsize, len(self._entries))
+
+
+# Descriptions of the kinds of issues collected by _Diagnostics
+_ISSUE_LABELS = collections.OrderedDict([
+    ('not_found', 'not found'),
+    ('multiple_matches', 'with multiple regex matches'),
+    ('fuzzy_matches', 'matched by similarity'),
+    ('not_found_a', 'of list_a not identified'),
+    ('multiple_matches_a', 'of list_a with multiple regex matches'),
+    ('not_found_b', 'of list_a without correspondence in list_b'),
+    ('multiple_matches_b', 'of list_a with multiple matches in list_b'),
+])
+
+
+class _Diagnostics():
+    """ Not found and ambiguous names of one call
+
+    The issues are logged as one summary line per call (see log) and
+    can be returned as report.
+
+    Parameters
+    ----------
+
+    kinds : list of str
+        Kinds of issues (keys of _ISSUE_LABELS) collected
+    """
+
+    def __init__(self, kinds):
+        self.issues = collections.OrderedDict(
+            (kind, collections.OrderedDict()) for kind in kinds)
+
+    def add(self, kind, name, detail=None):
+        """ Records an issue of kind for name, detail is kept as given """
+        self.issues[kind].setdefault(name, detail)
+
+    def __bool__(self):
+        return any(self.issues.values())
+
+    def log(self, context, n_unique, max_names=5):
+        """ Logs one warning line summarizing all issues (if any) """
+        if not self:
+            return
+        parts = []
+        for kind, names in self.issues.items():
+            if not names:
+                continue
+            shown = ', '.join(str(name)
+                              for name in itertools.islice(names, max_names))
+            if len(names) > max_names:
+                shown += ', ...'
+            parts.append('{} of {} distinct names {} ({})'.format(
+                len(names), n_unique, _ISSUE_LABELS[kind], shown))
+        logging.warning('{}: {}'.format(context, '; '.join(parts)))
+
+    def report(self, n_names, n_unique, counts):
+        """ Issues as dict
+
+        Parameters
+        ----------
+
+        n_names, n_unique : int
+            Number of all and distinct names of the call
+
+        counts : callable
+            Number of occurrences of a distinct name in the call
+
+        Returns
+        -------
+
+        dict with 'names' and 'unique_names' (n_names, n_unique), for
+        each kind an OrderedDict name -> detail and 'counts' with the
+        number of affected names (including repetitions) per kind
+        """
+        report = {'names': n_names, 'unique_names': n_unique}
+        report.update((kind, collections.OrderedDict(names))
+                      for kind, names in self.issues.items())
+        report['counts'] = dict(
+            (kind, sum(counts(name) for name in names))
+            for kind, names in self.issues.items())
+        return report
+
+
+def _regex_literals(parsed_regex, min_length=4):
+    """ All literal strings of a parsed regex (lower case)
+
+    In contrast to _regex_literal_cover, this includes the literals of
+    all alternatives, e.g. 'zaire' and 'kinshasa' for 'zaire|kinshasa'.
+    """
+    literals = []
+    literal_run = []
+    for op, av in list(parsed_regex) + [(None, None)]:
+        if op is sre_parse.LITERAL and av < 128:
+            literal_run.append(chr(av))
+            continue
+        if len(literal_run) >= min_length:
+            literals.append(''.join(literal_run).lower())
+        literal_run = []
+        if op is sre_parse.SUBPATTERN:
+            literals.extend(_regex_literals(av[-1], min_length))
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                literals.extend(_regex_literals(branch, min_length))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            literals.extend(_regex_literals(av[2], min_length))
+    return literals
+
+
+def _trigrams(text):
+    """ Set of the character trigrams of text
+
+    The text is case folded, non alphanumeric characters are taken as
+    spaces and the text is padded with spaces.
+    """
+    text = '  ' + _NON_ALNUM.sub(' ', text.casefold()).strip() + ' '
+    return set(text[pos:pos + 3] for pos in range(len(text) - 2))
+
+
+class _FuzzyIndex():
+    """ Trigram inverted index for the similarity search of names
+
+    Parameters
+    ----------
+
+    entries : iterable of (text, row_id)
+        Names (and name variants) of the rows of the country data
+    """
+
+    def __init__(self, entries):
+        self.texts = []
+        self.rows = []
+        self.sizes = []
+        self.postings = dict()
+        for text, row_id in collections.OrderedDict.fromkeys(entries):
+            grams = _trigrams(text)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(len(self.texts))
+            self.texts.append(text)
+            self.rows.append(row_id)
+            self.sizes.append(len(grams))
+
+    def search(self, name, limit=1):
+        """ Entries most similar to name
+
+        The similarity is the Dice coefficient of the trigram sets
+        (2 * shared / (trigrams of name + trigrams of entry)).
+
+        Returns
+        -------
+
+        list of (score, entry id), the best first (all if limit is None)
+        """
+        grams = _trigrams(name)
+        shared = collections.Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scores = [(2 * count / (len(grams) + self.sizes[entry]), entry)
+                  for entry, count in shared.items()]
+        scores.sort(key=lambda score_entry: (-score_entry[0],
+                                             score_entry[1]))
+        return scores[:limit]
+
+
+class _CallStats():
+    """ Timings and counts of one instrumented convert call
+
+    The time of the stages (prepare, exclusion, detection, regex, code,
+    match, output) is taken with lap, which adds the time since the
+    previous lap to the given stage.
+    """
+
+    def __init__(self):
+        self.names = 0
+        self.unique_names = 0
+        self.cache_hits = 0
+        self.regex_tried = 0
+        self.regex_matched = 0
+        self.stage_time = collections.Counter()
+        self.src_formats = collections.Counter()
+        self.pattern_time = collections.Counter()
+        self.pattern_tests = collections.Counter()
+        self._last = time.perf_counter()
+
+    def lap(self, stage=None):
+        """ Adds the time since the last lap to stage (None: discard) """
+        now = time.perf_counter()
+        if stage is not None:
+            self.stage_time[stage] += now - self._last
+        self._last = now
+
+    def merge(self, other):
+        """ Adds the timings and counts of other """
+        self.names += other.names
+        self.unique_names += other.unique_names
+        self.cache_hits += other.cache_hits
+        self.regex_tried += other.regex_tried
+        self.regex_matched += other.regex_matched
+        self.stage_time.update(other.stage_time)
+        self.src_formats.update(other.src_formats)
+        self.pattern_time.update(other.pattern_time)
+        self.pattern_tests.update(other.pattern_tests)
+
+    def report(self, n_patterns=10):
+        """ Timings and counts as dict, see CountryConverter.stats """
+        return {'names': self.names,
+                'unique_names': self.unique_names,
+                'cache_hits': self.cache_hits,
+                'stage_time': dict(self.stage_time),
+                'src_formats': dict(self.src_formats),
+                'regex_tried': self.regex_tried,
+                'regex_matched': self.regex_matched,
+                'slowest_patterns': [
+                    (pattern, seconds, self.pattern_tests[pattern])
+                    for pattern, seconds in
+                    self.pattern_time.most_common(n_patterns)]}
+
+
+class _ConvertStats():
+    """ Statistics of the (sampled) convert calls of a converter
+
+    Parameters
+    ----------
+
+    sample : float
+        Fraction of the calls which are instrumented
+
+    callback : callable or None
+        Called with the report of every instrumented call
+    """
+
+    def __init__(self, sample=1.0, callback=None):
+        self.sample = sample
+        self.callback = callback
+        self.calls = 0
+        self.sampled_calls = 0
+        self.total = _CallStats()
+        self._lock = threading.Lock()
+
+    def start_call(self):
+        """ _CallStats for a new call, None if it is not sampled """
+        with self._lock:
+            self.calls += 1
+        if self.sample < 1 and random.random() >= self.sample:
+            return None
+        return _CallStats()
+
+    def finish_call(self, call_stats):
+        with self._lock:
+            self.sampled_calls += 1
+            self.total.merge(call_stats)
+        if self.callback is not None:
+            self.callback(call_stats.report())
+
+    def report(self, n_patterns=10):
+        with self._lock:
+            report = self.total.report(n_patterns)
+            report['calls'] = self.calls
+            report['sampled_calls'] = self.sampled_calls
+        return report
+
+
+def _regex_literal_cover(parsed_regex, min_length=3):
+    """ Literals of which at least one is part of every match of a regex
+
+    Parameters
+    ----------
+
+    parsed_regex : sre_parse.SubPattern
+        Parsed regular expression (or a part of it)
+
+    min_length : int, optional
+        Minimum length of the literal strings considered
+
+    Returns
+    -------
+
+    set of lower case str or None if no such literals could be determined
+    """
+    best = None
+    literal_run = []
+
+    def consider(candidate):
+        nonlocal best
+        if candidate is None:
+            return
+        if best is None or (min(len(lit) for lit in candidate) / len(candidate)
+                            > min(len(lit) for lit in best) / len(best)):
+            best = candidate
+
+    def flush_run():
+        if len(literal_run) >= min_length:
+            consider({''.join(literal_run).lower()})
+        literal_run.clear()
+
+    for op, av in parsed_regex:
+        if op is sre_parse.LITERAL and av < 128:
+            literal_run.append(chr(av))
+            continue
+        flush_run()
+        if op is sre_parse.SUBPATTERN:
+            consider(_regex_literal_cover(av[-1], min_length))
+        elif op is sre_parse.BRANCH:
+            branch_covers = [_regex_literal_cover(branch, min_length)
+                             for branch in av[1]]
+            if None not in branch_covers:
+                consider(set().union(*branch_covers))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] > 0:
+            consider(_regex_literal_cover(av[2], min_length))
+    flush_run()
+
+    return best
+
+
+# Compiled exclusion splitters per exclude_prefix, see _get_excluder
+_EXCLUDERS = dict()
+
+
+def _get_excluder(exclude_prefix):
+    """ Compiled splitter and literal prefilter for exclude_prefix
+
+    The splitter is compiled once per distinct exclude_prefix.
+
+    Parameters
+    ----------
+
+    exclude_prefix : list of valid regex strings
+
+    Returns
+    -------
+
+    tuple (excluder, literals) with the compiled alternation of the
+    prefixes and the lower case literals of which at least one is part
+    of any name containing a prefix (None if these can not be determined)
+    """
+    key = tuple(exclude_prefix)
+    try:
+        return _EXCLUDERS[key]
+    except KeyError:
+        pass
+    excluder = re.compile('|'.join(exclude_prefix))
+    literals = set()
+    for prefix in exclude_prefix:
+        try:
+            cover = _regex_literal_cover(sre_parse.parse(prefix),
+                                         min_length=1)
+        except Exception:
+            cover = None
+        if cover is None:
+            literals = None
+            break
+        literals.update(cover)
+    _EXCLUDERS[key] = (excluder,
+                       None if literals is None else tuple(literals))
+    return _EXCLUDERS[key]
+
+
+# Marker for missing values in the integer columns of _CountryTable
+_MISSING_INT = np.iinfo(np.int64).min
+
+# Accession year of non members in the membership indexes
+_NOT_MEMBER = np.iinfo(np.int64).max
+
+# Membership groups -> data column with the accession year
+_MEMBERSHIP_GROUPS = {'EU': 'EU', 'EURO': 'EURO', 'OECD': 'OECD',
+                      'UN': 'UNmember', 'UNMEMBER': 'UNmember'}
+
+
+def _is_missing(value):
+    """ True for None, NaN, pandas.NA and empty strings """
+    if value is None or (isinstance(value, str) and not value):
+        return True
+    try:
+        return bool(value != value)
+    except TypeError:   # pandas.NA
+        return True
+
+
+def _compact_column(values):
+    """ Compact representation of the values of a data column
+
+    Returns a numpy int64 array (missing values as _MISSING_INT) if all
+    values are integer numbers, otherwise a tuple of interned str (missing
+    values as None). Strings are only taken as integers if they are the
+    plain representation of the number (e.g. '1946' but not '004').
+    """
+    int_values = []
+    for value in values:
+        if _is_missing(value):
+            int_values.append(_MISSING_INT)
+            continue
+        try:
+            int_value = int(value)
+        except (TypeError, ValueError):
+            break
+        if int_value != value and str(int_value) != value:
+            break
+        int_values.append(int_value)
+    else:
+        return np.array(int_values, dtype=np.int64)
+    return tuple(None if _is_missing(value) else sys.intern(str(value))
+                 for value in values)
+
+
+class _CountryTable():
+    """ Compact column store of the country data
+
+    Columns with integer values only (e.g. ISOnumeric, UNcode, EU, OECD)
+    are kept as numpy int64 arrays with _MISSING_INT for missing values,
+    all other columns as tuples of interned strings with None for missing
+    values (see _compact_column). Tables attached from a ConverterSnapshot
+    keep these columns as read-only numpy unicode arrays with '' for
+    missing values. Rows are addressed by their position.
+
+    Parameters
+    ----------
+
+    columns : OrderedDict
+        column name -> compact column values (all of the same length)
+    """
+
+    __slots__ = ('columns', 'n_rows')
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.n_rows = len(next(iter(columns.values()))) if columns else 0
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """ Builds the table from a pandas DataFrame """
+        return cls.from_lists(collections.OrderedDict(
+            (str(name), df[name].tolist()) for name in df.columns))
+
+    @classmethod
+    def from_lists(cls, columns):
+        """ Builds the table from column name -> list of values """
+        return cls(collections.OrderedDict(
+            (name, _compact_column(values))
+            for name, values in columns.items()))
+
+    def is_int_column(self, name):
+        column = self.columns[name]
+        return isinstance(column, np.ndarray) and column.dtype.kind == 'i'
+
+    def is_shared(self, name):
+        """ True for read-only array columns (see ConverterSnapshot) """
+        column = self.columns[name]
+        return isinstance(column, np.ndarray) and not column.flags.writeable
+
+    def entries(self, name):
+        """ Values of a str column as sequence of str, None if missing """
+        column = self.columns[name]
+        if isinstance(column, np.ndarray):
+            return _ColumnView(column, None)
+        return column
+
+    def output_values(self, name):
+        """ Values of a column as list of int/str, np.nan if missing """
+        if self.is_int_column(name):
+            return [np.nan if value == _MISSING_INT else value
+                    for value in self.columns[name].tolist()]
+        return [np.nan if value is None else value
+                for value in self.entries(name)]
+
+    def select(self, rows):
+        """ New table with the given rows (sequence of row ids) """
+        rows = np.asarray(rows, dtype=np.intp)
+        return _CountryTable(collections.OrderedDict(
+            (name, column[rows] if isinstance(column, np.ndarray) else
+             tuple(column[row] for row in rows.tolist()))
+            for name, column in self.columns.items()))
+
+    def to_dataframe(self, columns=None, rows=None):
+        """ Table as pandas DataFrame
+
+        Integer columns are given as float (with NaN for missing values),
+        as read by pandas from the country data file.
+
+        Parameters
+        ----------
+
+        columns : list of str, optional
+            Columns to include, default: all
+
+        rows : sequence of int, optional
+            Row ids to include (these are the index of the DataFrame),
+            default: all
+        """
+        columns = list(self.columns) if columns is None else list(columns)
+        if rows is None:
+            rows = np.arange(self.n_rows)
+        rows = np.asarray(rows, dtype=np.intp)
+        data = collections.OrderedDict()
+        for name in columns:
+            if self.is_int_column(name):
+                values = self.columns[name][rows]
+                data[name] = np.where(values == _MISSING_INT, np.nan,
+                                      values.astype(float))
+            else:
+                column = self.entries(name)
+                data[name] = [np.nan if column[row] is None else column[row]
+                              for row in rows.tolist()]
+        return _pandas().DataFrame(data, index=rows, columns=columns)
+
+
 class CountryConverter():
     """ Main class for converting countries
 
@@ -181,7 +1122,8 @@ class CountryConverter():
     ----------
 
     data : pandas DataFrame
-        Raw data read from country_data.txt
+        Raw data read from country_data.txt (created on first access,
+        the conversions use a compact internal representation)
 
     """
 
@@ -208,16 +1150,39 @@ class CountryConverter():
             'clean_name' : str
                 as name without anything following exclude_prefix
             'excluded_countries' : list
-                list of excluded countries
+                list of the names following the prefixes. If a prefix
+                matches everything following it (as 'excl\\w.*'), the
+                first word of the match is taken as the prefix.
 
         """
 
-        excluder = re.compile('|'.join(exclude_prefix))
-        split_entries = excluder.split(name)
-        return {'clean_name': split_entries[0],
-                'excluded_countries': split_entries[1:]}
-
-    def __init__(self, country_data=COUNTRY_DATA_FILE, additional_data=None):
+        if not exclude_prefix:
+            return {'clean_name': name, 'excluded_countries': []}
+        excluder, literals = _get_excluder(exclude_prefix)
+        if literals is not None:
+            lower_name = name.lower()
+            if not any(literal in lower_name for literal in literals):
+                return {'clean_name': name, 'excluded_countries': []}
+
+        prefixes = list(excluder.finditer(name))
+        if not prefixes:
+            return {'clean_name': name, 'excluded_countries': []}
+        excluded = []
+        for prefix, next_prefix in zip(
+                prefixes, prefixes[1:] + [None]):
+            end = len(name) if next_prefix is None else next_prefix.start()
+            part = name[prefix.end():end]
+            if not part.strip():
+                part = name[prefix.start():end].split(None, 1)[1:]
+                part = part[0] if part else ''
+            part = part.strip(' ,;:()[]')
+            if part:
+                excluded.append(part)
+        return {'clean_name': name[:prefixes[0].start()],
+                'excluded_countries': excluded}
+
+    def __init__(self, country_data=COUNTRY_DATA_FILE, additional_data=None,
+                 cache_size=4096, use_cache=True):
         """
         Parameters
         ----------
@@ -231,167 +1196,1300 @@ class CountryConverter():
             This must be given in the same format as specified in the
             country_data_file. (utf-8 encoded tab separated data, same
             column headers in all files)
+
+        cache_size: int, optional
+            Number of resolved names kept across convert calls
+            (least recently used are dropped first). 0 disables the cache.
+            Default: 4096
+
+        use_cache: boolean, optional
+            If True (default) and all data is given as files, the validated
+            data and lookup indexes are loaded from a cached artifact
+            if one exists for the current content of the files and the
+            package version. Otherwise the data is read from the files.
+            The artifact is only written by build_cache (see also
+            get_cache_dir).
         """
 
-        must_be_unique = ['name_short', 'name_official', 'regex']
+        self._init_caches(cache_size)
 
-        def test_for_unique_names(df, data_name='passed dataframe',
-                                  report_fun=logging.error):
-            for name_entry in must_be_unique:
-                if df[name_entry].duplicated().any():
-                    report_fun('Duplicated values in column {} of {}'.format(
-                        name_entry, data_name))
+        if additional_data is None:
+            additional_data = []
+        if not isinstance(additional_data, list):
+            additional_data = [additional_data]
 
-        def data_loader(data):
-            if isinstance(data, pd.DataFrame):
-                ret = data
-                test_for_unique_names(data)
-            else:
-                ret = pd.read_table(data, sep='\t', encoding='utf-8')
-                test_for_unique_names(ret, data)
-            return ret
+        artifact = None
+        if use_cache and os.path.isdir(get_cache_dir()):
+            try:
+                artifact = _artifact_path([country_data] + additional_data)
+            except OSError:
+                artifact = None
+
+        state = _load_artifact(artifact) if artifact else None
+        if state is not None:
+            for level, msg in state['messages']:
+                logging.log(level, msg)
+            self._set_state(state)
+            return
+
+        self._data_messages = []
+        self._table = self._load_data(country_data, additional_data)
+        self._data_frame = None
+        self._setup_regexes()
+        self._build_regex_prefilter()
+
+    def _init_caches(self, cache_size):
+        """ Sets up the (empty) lookups, caches and statistics
+
+        The caches of compiled regexes and their literals are keyed by
+        the pattern and read by overlays (see overlay).
+        """
+        self._code_index = dict()
+        self._columns = dict()
+        self._membership = dict()
+        self._member_rows = dict()
+        self._regions = dict()
+        self._concordances = dict()
+        self._name_cache = _LRUCache(cache_size)
+        self._in_flight = weakref.WeakKeyDictionary()
+        self._regex_cache = dict()
+        self._regex_covers = dict()
+        self._fuzzy_index = None
+        self._code_formats = None
+        self._stats = None
+        # keeps the buffer of the data alive (see ConverterSnapshot)
+        self._snapshot = None
+
+    def _load_data(self, country_data, additional_data):
+        """ Reads, validates and merges the country data
+
+        Messages about duplicated entries are logged and kept in
+        _data_messages (to be replayed when loading cached data).
 
-        basic_df = data_loader(country_data)
+        Parameters
+        ----------
 
-        if additional_data is None:
-            additional_data = []
+        country_data : pandas dataframe or path to data file
+
+        additional_data: list of pandas dataframes or data files
+
+        Returns
+        -------
+
+        _CountryTable
+        """
+        sources = [self._read_source(data)
+                   for data in [country_data] + additional_data]
+        return self._merge_sources(sources)[0]
+
+    def _test_for_unique_names(self, columns, data_name='passed dataframe',
+                               report_level=logging.ERROR):
+        """ Reports duplicated values in the columns which must be unique """
+        for name_entry in _MUST_BE_UNIQUE:
+            values = [None if _is_missing(value) else value
+                      for value in columns[name_entry]]
+            if len(set(values)) < len(values):
+                msg = 'Duplicated values in column {} of {}'.format(
+                    name_entry, data_name)
+                self._data_messages.append((report_level, msg))
+                logging.log(report_level, msg)
+
+    def _read_source(self, data):
+        """ Reads a pandas dataframe or data file to column -> values """
+        if _is_dataframe(data):
+            ret = collections.OrderedDict(
+                (str(name), data[name].tolist()) for name in data.columns)
+            self._test_for_unique_names(ret)
+        else:
+            ret = _read_data_file(data)
+            self._test_for_unique_names(ret, data)
+        return ret
+
+    def _merge_sources(self, sources):
+        """ Merges data sources, later entries replace earlier ones
+
+        Returns
+        -------
+
+        tuple (table, rows) with the merged _CountryTable and the positions
+        of its rows in the concatenated sources
+        """
+        # all columns of all sources, missing entries filled with None
+        data = collections.OrderedDict()
+        for source in sources:
+            for name in source:
+                data.setdefault(name, [])
+        for source in sources:
+            source_length = len(next(iter(source.values()), []))
+            for name, values in data.items():
+                values.extend(source.get(name, [None] * source_length))
+
+        self._test_for_unique_names(
+            data,
+            data_name='merged data - keep last one',
+            report_level=logging.WARNING)
+
+        rows = list(range(len(data['name_short'])))
+        for name_entry in _MUST_BE_UNIQUE:
+            seen = set()
+            kept_rows = []
+            for row in reversed(rows):
+                value = data[name_entry][row]
+                key = None if _is_missing(value) else value
+                if key not in seen:
+                    seen.add(key)
+                    kept_rows.append(row)
+            rows = kept_rows[::-1]
+
+        table = _CountryTable.from_lists(collections.OrderedDict(
+            (name, [values[row] for row in rows])
+            for name, values in data.items()))
+        return table, rows
+
+    def _get_state(self):
+        """ Data and lookup indexes for the cached data artifact """
+        for src_format in _PREBUILT_INDEXES:
+            if src_format in self._table.columns:
+                self._get_code_index(src_format)
+        return {'format': _ARTIFACT_FORMAT,
+                'messages': self._data_messages,
+                'table': self._table,
+                'regex_buckets': self._regex_buckets,
+                'regex_unfiltered': self._regex_unfiltered,
+                'code_index': self._code_index}
+
+    def _set_state(self, state):
+        """ Restores the data and lookup indexes from a cached artifact """
+        self._data_messages = state['messages']
+        self._table = state['table']
+        self._data_frame = None
+        self._setup_regexes()
+        self._regex_buckets = state['regex_buckets']
+        self._regex_unfiltered = state['regex_unfiltered']
+        self._code_index = dict(state['code_index'])
+
+    @property
+    def data(self):
+        """ Country data as pandas DataFrame
+
+        The DataFrame is created from the internal data on first access.
+        Assigning a DataFrame replaces the country data of the converter.
+        Modifications of the DataFrame in place are only taken over by
+        the converter after calling refresh.
+        """
+        if self._data_frame is None:
+            self._data_frame = self._table.to_dataframe()
+        return self._data_frame
+
+    @data.setter
+    def data(self, df):
+        self._table = _CountryTable.from_dataframe(df)
+        self._reset_lookups()
+        self._data_frame = df
+
+    def refresh(self):
+        """ Takes over modifications of .data made in place
+
+        The converter works on an internal copy of the country data, so
+        changes of the DataFrame in .data (e.g. cc.data.loc[...] = ...)
+        are only used for conversions after calling this method.
+        Assigning a DataFrame to .data does not require it.
+        """
+        data_frame = self._data_frame
+        if data_frame is None:
+            return
+        self._table = _CountryTable.from_dataframe(data_frame)
+        self._reset_lookups()
+        self._data_frame = data_frame
+
+    def _reset_lookups(self):
+        """ Discards everything derived from the data after it changed """
+        self._data_frame = None
+        self._code_index = dict()
+        self._columns = dict()
+        self._membership = dict()
+        self._member_rows = dict()
+        self._regions = dict()
+        self._concordances = dict()
+        self._fuzzy_index = None
+        self._code_formats = None
+        self._name_cache.clear()
+        self._setup_regexes()
+        self._build_regex_prefilter()
+
+    def freeze(self):
+        """ Immutable snapshot of the data of the converter
+
+        The snapshot can be written to a file or shared memory and
+        attached zero-copy by other processes, see ConverterSnapshot.
+
+        Returns
+        -------
+
+        ConverterSnapshot
+        """
+        return ConverterSnapshot.from_converter(self)
+
+    def overlay(self, additional_data, cache_size=None):
+        """ New converter with additional data layered on this one
+
+        The new converter gives the same results as a CountryConverter
+        with the data of this converter and additional_data, but only
+        the additional data is read and prepared: the strings, compiled
+        regular expressions and code indexes of this converter are
+        reused. This converter is not changed.
+
+        Parameters
+        ----------
+
+        additional_data: (list of) pandas dataframes or data files
+            Data to add (replacing existing entries), see CountryConverter
+
+        cache_size: int, optional
+            Size of the name cache of the new converter,
+            default: same as for this converter
+
+        Returns
+        -------
+
+        CountryConverter
+        """
         if not isinstance(additional_data, list):
             additional_data = [additional_data]
+        if cache_size is None:
+            cache_size = self._name_cache.maxsize
+
+        converter = object.__new__(type(self))
+        converter._init_caches(cache_size)
+        # the patterns of this converter are reused, new ones are only
+        # kept by the overlay
+        converter._regex_cache = collections.ChainMap(
+            dict(), self._regex_cache)
+        converter._regex_covers = collections.ChainMap(
+            dict(), self._regex_covers)
+        converter._data_messages = list(self._data_messages)
+
+        base = collections.OrderedDict(
+            (name, self._table.output_values(name))
+            for name in self._table.columns)
+        table, rows = converter._merge_sources(
+            [base] + [converter._read_source(data)
+                      for data in additional_data])
+        converter._table = table
+        converter._data_frame = None
+        converter._setup_regexes()
+        converter._build_regex_prefilter()
+
+        # base rows keep their order, the additional rows follow them
+        new_row_ids = dict((old, new) for new, old in enumerate(rows))
+        added_rows = range(sum(old < self._table.n_rows for old in rows),
+                           len(rows))
+        for src_format, base_index in self._code_index.items():
+            index = dict()
+            for code, row_ids in base_index.items():
+                row_ids = [new_row_ids[row_id] for row_id in row_ids
+                           if row_id in new_row_ids]
+                if row_ids:
+                    index[code] = row_ids
+            converter._add_to_code_index(index, src_format, added_rows)
+            converter._code_index[src_format] = index
+        return converter
+
+    def convert(self, names, src=None, to='ISO3', enforce_list=False,
+                not_found='not found',
+                exclude_prefix=['excl\\w.*', 'without', 'w/o'], n_jobs=1,
+                diagnostics=False, fuzzy=None):
+        """ Convert names from a list to another list.
+
+        Note
+        ----
+        A lot of the functionality can also be done directly in pandas
+        dataframes.
+        For example:
+        coco = CountryConverter()
+        names = ['USA', 'SWZ', 'PRI']
+        coco.data[coco.data['ISO3'].isin(names)][['ISO2', 'continent']]
+
+        Parameters
+        ----------
+        names : str or list like
+            Countries in 'src' classification to convert
+            to 'to' classification
+
+        src : str, optional
+            Source classification. If None (default), each passed name is
+            looked up in one combined index of the ISO3, ISO2, ISOnumeric
+            and UNcode codes (in this order of priority, numbers with
+            leading zeros such as '040' included); names which are not a
+            code are matched by 'regex'.
+
+        to : str or list of str, optional
+            Output classification (valid index of the country_data.txt),
+            default: ISO3. If a list of classifications is passed, the names
+            are matched once and each converted name is given as a tuple
+            with one entry per classification.
+
+        enforce_list : boolean, optional
+            If True, enforces the output to be list (if only one name was
+            passed) or to be a list of lists (if multiple names were passed).
+            If False (default), the output will be a string (if only one name
+            was passed) or a list of str and/or lists (str if a one to one
+            matching, list otherwise).
+
+        not_found : str, optional
+            Fill in value for none found entries. If None, keep the input value
+            (default: 'not found')
+
+        exclude_prefix : list of valid regex strings
+            List of indicators with negate the subsequent country/region.
+            These prefixes and everything following will not be converted.
+            E.g. 'Asia excluding China' becomes 'Asia' and
+            'China excluding Hong Kong' becomes 'China' prior to conversion
+            Default: ['excl\\w.*', 'without', 'w/o'])
+
+        n_jobs : int, optional
+            Number of processes used for matching the distinct names which
+            are not cached yet. 1 (default) matches in the current process,
+            -1 uses all cpus (-2 all but one, ...), 0 is not valid. The
+            country data is sent once to each process; the results are in
+            input order.
+
+        diagnostics : boolean, optional
+            If True, a report of the not found and ambiguous names is
+            returned as well (default: False). Independent of this, these
+            names are logged in one line per call.
+
+        fuzzy : float, optional
+            Minimum similarity (between 0 and 1) for matching names which
+            are not matched by any regex to the most similar name of the
+            country data (see fuzzy_candidates). Names are only matched
+            if the similarity is at least fuzzy, e.g. 0.6.
+            If None (default), names are matched by regex only.
+
+        Returns
+        -------
+        list or str (tuples for a list of 'to'), depending on enforce_list
+
+        With diagnostics, a tuple (converted names, report) with the
+        report dict containing 'names' and 'unique_names' (number of all
+        and distinct names), 'not_found' (name -> source classification),
+        'multiple_matches' (name -> matching regexes), 'fuzzy_matches'
+        (name -> (most similar name, similarity)) and 'counts', the number
+        of names (including repetitions) per kind of issue.
+
+        """
+        recorder = self._stats
+        stats = None if recorder is None else recorder.start_call()
+        unique_names, name_codes, src, to_list = self._prepare_convert(
+            names, src, to)
+        if stats is not None:
+            stats.lap('prepare')
+            stats.names = len(name_codes)
+            stats.unique_names = len(unique_names)
+        issues = _Diagnostics(['not_found', 'multiple_matches',
+                               'fuzzy_matches'])
+        unique_out = self._convert_unique(
+            unique_names, src, to_list, enforce_list, not_found,
+            exclude_prefix, n_jobs, stats=stats, diagnostics=issues,
+            fuzzy=fuzzy)
+        output = self._assemble_output(unique_out, name_codes,
+                                       not isinstance(to, str), enforce_list)
+        if stats is not None:
+            stats.lap('output')
+            recorder.finish_call(stats)
+        return self._finish_convert(output, issues, unique_names,
+                                    name_codes, diagnostics)
+
+    async def aconvert(self, names, src=None, to='ISO3', enforce_list=False,
+                       not_found='not found',
+                       exclude_prefix=['excl\\w.*', 'without', 'w/o'],
+                       executor=None, diagnostics=False, fuzzy=None):
+        """ Asyncio version of convert
+
+        Names found in the cache of resolved names are converted directly,
+        all others are matched in one batch in executor, so the event loop
+        is not blocked by the regex matching. Concurrent calls which need
+        the same uncached name share one matching of it.
+
+        Parameters
+        ----------
+        names, src, to, enforce_list, not_found, exclude_prefix,
+        diagnostics, fuzzy :
+            See convert
+
+        executor : concurrent.futures.Executor, optional
+            Executor for the matching, default: the default executor of
+            the event loop. With a process pool, the converter is sent
+            along with every batch.
+
+        Returns
+        -------
+        See convert
+
+        """
+        recorder = self._stats
+        stats = None if recorder is None else recorder.start_call()
+        unique_names, name_codes, src, to_list = self._prepare_convert(
+            names, src, to)
+        if stats is not None:
+            stats.lap('prepare')
+            stats.names = len(name_codes)
+            stats.unique_names = len(unique_names)
+        matches = await self._amatch_names(unique_names, src, exclude_prefix,
+                                           executor)
+        if stats is not None:
+            stats.lap('match')
+        issues = _Diagnostics(['not_found', 'multiple_matches',
+                               'fuzzy_matches'])
+        unique_out = self._convert_unique(
+            unique_names, src, to_list, enforce_list, not_found,
+            exclude_prefix, matches=matches, stats=stats,
+            diagnostics=issues, fuzzy=fuzzy)
+        output = self._assemble_output(unique_out, name_codes,
+                                       not isinstance(to, str), enforce_list)
+        if stats is not None:
+            stats.lap('output')
+            recorder.finish_call(stats)
+        return self._finish_convert(output, issues, unique_names,
+                                    name_codes, diagnostics)
+
+    def split_exclusions(self, names, src=None, to='ISO3',
+                         not_found='not found',
+                         exclude_prefix=['excl\\w.*', 'without', 'w/o']):
+        """ Converts names and the countries excluded from them
+
+        Names are split at the exclude_prefix (e.g. 'Asia excluding China'
+        into 'Asia' and 'China'), the main part is converted as in convert
+        and the excluded parts are converted as countries. Names without
+        a prefix are only checked for the literals of the prefixes.
+
+        Parameters
+        ----------
+        names : str or list like
+            Countries in 'src' classification
+
+        src : str, optional
+            Source classification, see convert. Used for the excluded
+            parts as well.
+
+        to : str, optional
+            Output classification (valid index of the country_data.txt),
+            default: ISO3
+
+        not_found : str, optional
+            See convert
+
+        exclude_prefix : list of valid regex strings
+            See convert
+
+        Returns
+        -------
+        Exclusion namedtuple (name, excluded) for a single name, otherwise
+        a list of them. 'name' is the converted name (as returned by
+        convert) and 'excluded' a list of the converted excluded
+        countries (empty for names without exclusion).
+
+        """
+        unique_names, name_codes, src, to_list = self._prepare_convert(
+            names, src, to)
+        if len(to_list) != 1:
+            raise TypeError('split_exclusions converts to one '
+                            'classification only')
+        unique_included = self._convert_unique(
+            unique_names, src, to_list, False, not_found,
+            exclude_prefix)[0]
+
+        unique_parts = [self._separate_exclude_cases(
+            name, exclude_prefix)['excluded_countries']
+            for name in unique_names]
+        parts = list(collections.OrderedDict.fromkeys(
+            itertools.chain.from_iterable(unique_parts)))
+        converted_parts = dict(zip(parts, self._convert_unique(
+            parts, src, to_list, True, not_found, [])[0]))
+
+        unique_out = [
+            Exclusion(included, list(itertools.chain.from_iterable(
+                converted_parts[part] for part in name_parts)))
+            for included, name_parts in zip(unique_included, unique_parts)]
+        outlist = [unique_out[code] for code in name_codes]
+        return outlist[0] if isinstance(names, str) else outlist
+
+    def _prepare_convert(self, names, src, to):
+        """ Validates the convert parameters and factorizes the names
+
+        Returns
+        -------
+
+        tuple (unique_names, name_codes, src, to_list) with
+            unique_names : OrderedDict with the distinct names (as str) as keys
+            name_codes : list with the position in unique_names for
+                every passed name
+            src : validated src
+            to_list : list of the validated to classification(s)
+        """
+        # The list to tuple conversion is necessary for matlab interface,
+        # other list likes (numpy arrays, pandas Series) are handled alike
+        if isinstance(names, str) or not hasattr(names, '__iter__'):
+            names = [names]
+        elif not isinstance(names, list):
+            names = list(names)
+
+        names = [str(n) for n in names]
+
+        to_list = [to] if isinstance(to, str) else list(to)
+        to_list = [self._validate_input_para(etr, self._table.columns)
+                   for etr in to_list]
+        if src is not None:
+            src = self._validate_input_para(src, self._table.columns)
+
+        # Each distinct name is resolved only once and the results are
+        # broadcast back to the positions of the input names
+        unique_names = collections.OrderedDict()
+        name_codes = [unique_names.setdefault(name, len(unique_names))
+                      for name in names]
+        return unique_names, name_codes, src, to_list
+
+    @staticmethod
+    def _finish_convert(output, issues, unique_names, name_codes,
+                        diagnostics):
+        """ Logs the issues of a convert call and adds the report """
+        issues.log('convert', len(unique_names))
+        if not diagnostics:
+            return output
+        counts = np.bincount(np.asarray(name_codes, dtype=np.intp),
+                             minlength=len(unique_names))
+        return output, issues.report(
+            len(name_codes), len(unique_names),
+            lambda name: int(counts[unique_names[name]]))
+
+    @staticmethod
+    def _assemble_output(unique_out, name_codes, multi_to, enforce_list):
+        """ Broadcasts the converted distinct names to the passed names """
+        if multi_to:
+            unique_out = list(zip(*unique_out))
+            outlist = [tuple(list(etr) if isinstance(etr, list) else etr
+                             for etr in unique_out[code])
+                       for code in name_codes]
+        else:
+            unique_out = unique_out[0]
+            outlist = [list(unique_out[code]) if
+                       isinstance(unique_out[code], list) else
+                       unique_out[code]
+                       for code in name_codes]
+
+        if (len(outlist) == 1) and not enforce_list:
+            return outlist[0]
+        else:
+            return outlist
+
+    def _convert_unique(self, unique_names, src, to_list, enforce_list,
+                        not_found, exclude_prefix, n_jobs=1, matches=None,
+                        stats=None, diagnostics=None, fuzzy=None):
+        """ Converts distinct names (see convert for the parameters)
+
+        All names are matched once and converted to every classification
+        in to_list. src and to_list must be validated classifications.
+        Already available _match_name results for the names can be passed
+        as matches. Timings and counts are added to the _CallStats stats
+        (if given). Not found and ambiguous names are added to the
+        _Diagnostics diagnostics; if not given, they are logged directly.
+        Names not matched by any regex are matched to the most similar
+        name if its similarity is at least fuzzy (if given).
+
+        Returns
+        -------
+
+        list with one entry per classification in to_list, each a list of
+        the converted entries (str/int or list) in the order of
+        unique_names
+        """
+        to_values = [self._get_column(to) for to in to_list]
+        unique_out = [[] for to in to_list]
+        if matches is None:
+            matches = self._match_names(unique_names, src, exclude_prefix,
+                                        n_jobs, stats)
+            if stats is not None:
+                stats.lap('match')
+        issues = diagnostics
+        if issues is None:
+            issues = _Diagnostics(['not_found', 'multiple_matches'])
+        for name, (spec_name, src_format, row_ids) in zip(unique_names,
+                                                          matches):
+
+            if len(row_ids) > 1 and src_format.lower() == 'regex':
+                issues.add('multiple_matches', name, tuple(
+                    self._regex_patterns[row_id] for row_id in row_ids))
+
+            if (len(row_ids) == 0 and fuzzy is not None and
+                    src_format.lower() == 'regex'):
+                best = self._get_fuzzy_index().search(spec_name)
+                if best and best[0][0] >= fuzzy:
+                    score, entry = best[0]
+                    row_ids = (self._fuzzy_index.rows[entry], )
+                    issues.add('fuzzy_matches', name,
+                               (self._fuzzy_index.texts[entry], score))
+
+            if len(row_ids) == 0:
+                issues.add('not_found', name, src_format)
+                _fillin = not_found or spec_name
+                for to_out in unique_out:
+                    to_out.append([_fillin] if enforce_list else _fillin)
+                continue
+
+            for to_out, values in zip(unique_out, to_values):
+                out_entry = [values[row_id] for row_id in row_ids]
+                if len(out_entry) == 1 and enforce_list is False:
+                    out_entry = out_entry[0]
+                to_out.append(out_entry)
+
+        if diagnostics is None:
+            issues.log('convert', len(matches))
+        if stats is not None:
+            stats.lap('output')
+        return unique_out
+
+    def fuzzy_candidates(self, name, to='name_short', limit=5):
+        """ Names of the country data most similar to name
+
+        The similarity is based on the character trigrams of the short
+        and official names and of the literal parts of the regular
+        expressions (e.g. 'zaire'), which are indexed on first use.
+
+        Parameters
+        ----------
+        name : str
+            Name to look up
+
+        to : str, optional
+            Classification of the returned countries, default: name_short
+
+        limit : int, optional
+            Maximum number of candidates, default: 5
+
+        Returns
+        -------
+        list of tuples (country in 'to', matched name, similarity) with
+        the similarity between 0 and 1, the most similar first (one per
+        country)
+
+        """
+        to = self._validate_input_para(to, self._table.columns)
+        index = self._get_fuzzy_index()
+        values = self._get_column(to)
+        candidates = collections.OrderedDict()
+        for score, entry in index.search(name, limit=None):
+            row_id = index.rows[entry]
+            if row_id not in candidates:
+                candidates[row_id] = (values[row_id], index.texts[entry],
+                                      score)
+                if len(candidates) == limit:
+                    break
+        return list(candidates.values())
+
+    def _get_fuzzy_index(self):
+        """ _FuzzyIndex of the names of the data (built on first use) """
+        if self._fuzzy_index is None:
+            entries = []
+            for column in ['name_short', 'name_official']:
+                entries.extend(
+                    (text, row_id) for row_id, text in
+                    enumerate(self._table.entries(column)
+                              if column in self._table.columns else ())
+                    if text is not None)
+            for row_id, pattern in enumerate(self._regex_patterns):
+                try:
+                    literals = _regex_literals(
+                        sre_parse.parse(pattern, re.IGNORECASE))
+                except Exception:
+                    literals = []
+                entries.extend((literal, row_id) for literal in literals)
+            self._fuzzy_index = _FuzzyIndex(entries)
+        return self._fuzzy_index
+
+    def _get_column(self, column):
+        """ Output values of a column of the country data (cached)
+
+        Integer columns (e.g. ISOnumeric) give int, missing values np.nan.
+        Shared columns (see ConverterSnapshot) are not copied to a list.
+        """
+        try:
+            return self._columns[column]
+        except KeyError:
+            pass
+        if self._table.is_shared(column):
+            values = _ColumnView(self._table.columns[column], np.nan)
+        else:
+            values = self._table.output_values(column)
+        self._columns[column] = values
+        return values
+
+    def convert_series(self, series, src=None, to='ISO3',
+                       not_found='not found',
+                       exclude_prefix=['excl\\w.*', 'without', 'w/o'],
+                       categorical=False):
+        """ Converts a pandas Series of country names
+
+        Every distinct value of the series is converted only once; the
+        results are mapped back to the series with the integer codes of
+        pd.factorize.
+
+        Parameters
+        ----------
+        series : pandas Series (or list like)
+            Countries in 'src' classification to convert
+            to 'to' classification. Missing values (NaN, None) give
+            missing values in the result.
+
+        src : str, optional
+            Source classification, see convert
+
+        to : str or list of str, optional
+            Output classification(s) (valid index of the country_data.txt),
+            default: ISO3. If a list is passed, a DataFrame with one column
+            per classification is returned.
+
+        not_found : str, optional
+            Fill in value for none found entries. If None, keep the input
+            value (default: 'not found')
+
+        exclude_prefix : list of valid regex strings
+            See convert
+
+        categorical : boolean, optional
+            If True, the result is categorical (multiple matches are given
+            as tuples). If False (default), the result has object dtype
+            (multiple matches are given as lists).
+
+        Returns
+        -------
+        pandas Series (for a single 'to') or DataFrame (for a list of 'to'),
+        with the index of the passed series
+
+        """
+        pd = _pandas()
+        if not isinstance(series, pd.Series):
+            series = pd.Series(series)
+        to_list = [to] if isinstance(to, str) else list(to)
+        to_list = [self._validate_input_para(etr, self._table.columns)
+                   for etr in to_list]
+        if src is not None:
+            src = self._validate_input_para(src, self._table.columns)
+
+        codes, uniques = pd.factorize(series, sort=False)
+        # str() can merge distinct values (e.g. 4 and '4'), the missing
+        # values (code -1) get the last entry of the lookup tables
+        unique_names = collections.OrderedDict()
+        unique_codes = [unique_names.setdefault(str(name), len(unique_names))
+                        for name in uniques]
+        unique_codes.append(len(unique_names))
+        name_codes = np.array(unique_codes, dtype=np.intp)[codes]
+
+        converted = dict()
+        all_unique_out = self._convert_unique(
+            unique_names, src, to_list, False, not_found, exclude_prefix)
+        for to_class, unique_out in zip(to_list, all_unique_out):
+            if categorical:
+                unique_out = [tuple(etr) if isinstance(etr, list) else etr
+                              for etr in unique_out]
+            lookup = np.empty(len(unique_out) + 1, dtype=object)
+            lookup[:-1] = unique_out
+            lookup[-1] = np.nan
+            converted[to_class] = pd.Series(
+                lookup[name_codes], index=series.index, name=to_class,
+                dtype='category' if categorical else object)
+
+        if isinstance(to, str):
+            return converted[to_list[0]]
+        return pd.DataFrame(converted, index=series.index,
+                            columns=to_list)
+
+    def aggregate(self, df, names=None, to='continent', src=None,
+                  agg='sum', by=None, not_found='not found',
+                  exclude_prefix=['excl\\w.*', 'without', 'w/o']):
+        """ Aggregates a table of country data to another classification
+
+        The countries are converted through a concordance between the rows
+        of the country data and the regions of 'to', which is built once
+        per classification. Every distinct name is matched only once and
+        the table is aggregated in one grouped reduction.
+
+        Parameters
+        ----------
+        df : pandas DataFrame or Series
+            Country data. Either a wide table with the countries in the
+            index or a long table with the countries in column 'names'.
+
+        names : column label, optional
+            Column with the countries (long table). If None (default),
+            the countries are taken from the index (wide table).
+
+        to : str, optional
+            Classification to aggregate to (valid index of the
+            country_data.txt), default: continent
+
+        src : str, optional
+            Source classification, see convert
+
+        agg : function, str, list or dict, optional
+            Aggregation passed to pandas GroupBy.agg, default: 'sum'
+
+        by : column label or list of column labels, optional
+            Further columns of a long table to group by (e.g. the year).
+            All remaining columns are aggregated.
+
+        not_found : str, optional
+            Region for countries which are not found or without an entry
+            in 'to'. If None, these countries are kept as they are.
+            Default: 'not found'
+
+        exclude_prefix : list of valid regex strings
+            See convert
+
+        Returns
+        -------
+        pandas DataFrame (or Series for a Series) with the regions of 'to'
+        (and the columns in 'by') as index. Countries matching several
+        regions are accounted in each of them.
+
+        """
+        pd = _pandas()
+        to = self._validate_input_para(to, self._table.columns)
+        if by is None:
+            by = []
+        elif not isinstance(by, list):
+            by = [by]
+        if names is None:
+            labels = df.index
+        else:
+            labels = df[names]
+            df = df.drop(columns=[names])
+
+        codes, uniques = pd.factorize(labels, sort=False)
+        unique_names, name_codes, src, _ = self._prepare_convert(
+            [str(name) for name in uniques], src, [])
+        region_labels, row_region = self._get_regions(to)
+        region_labels = list(region_labels)
+
+        unique_regions = []
+        issues = _Diagnostics(['not_found'])
+        for name, (spec_name, src_format, row_ids) in zip(
+                unique_names, self._match_names(unique_names, src,
+                                                exclude_prefix)):
+            regions = list(collections.OrderedDict.fromkeys(
+                row_region[row_id] for row_id in row_ids
+                if row_region[row_id] >= 0))
+            if not row_ids:
+                issues.add('not_found', name, src_format)
+            if not regions:
+                region_labels.append(not_found or spec_name)
+                regions = [len(region_labels) - 1]
+            unique_regions.append(regions)
+        issues.log('aggregate', len(unique_names))
+
+        # one entry per pair of table row and region, countries with
+        # several regions give several entries
+        counts = np.array([len(regions) for regions in unique_regions],
+                          dtype=np.intp)
+        offsets = np.cumsum(counts) - counts
+        pair_region = np.array(
+            list(itertools.chain.from_iterable(unique_regions)),
+            dtype=np.intp)
+        unique_codes = np.append(np.array(name_codes, dtype=np.intp), -1)
+        row_codes = unique_codes[codes]
+        row_counts = np.where(row_codes >= 0,
+                              counts[row_codes.clip(0)], 0)
+        positions = np.repeat(np.arange(len(row_codes)), row_counts)
+        within = (np.arange(len(positions)) -
+                  np.repeat(np.cumsum(row_counts) - row_counts, row_counts))
+        regions = pair_region[offsets[row_codes[positions]] + within]
+
+        table = df.iloc[positions]
+        keys = [pd.Index(np.array(region_labels, dtype=object)[regions],
+                         name=to)]
+        keys += [table[column].values for column in by]
+        if by:
+            table = table.drop(columns=by)
+        grouped = table.groupby(keys)
+        result = grouped.agg(agg)
+        if by:
+            result.index.names = [to] + by
+        return result
+
+    def concordance(self, src, to, sparse=True):
+        """ Concordance matrix between two classifications
+
+        The matrix has a 1 for every pair of src and to values which
+        occur together in a row of the country data. It is computed once
+        per converter and data (changing the data discards it).
+
+        Parameters
+        ----------
+        src : str
+            Source classification (valid index of the country_data.txt)
+
+        to : str
+            Target classification (valid index of the country_data.txt)
+
+        sparse : boolean, optional
+            If True (default), the matrix is a scipy.sparse csr_matrix
+            (requires scipy). If False, a read-only numpy array.
+
+        Returns
+        -------
+        Concordance namedtuple (matrix, src_labels, to_labels) with the
+        matrix of shape (len(src_labels), len(to_labels)) of int8 and the
+        labels as tuples in the order of the country data. Rows without
+        an entry in src or to are not included. The returned matrix is
+        shared between calls and must not be modified.
+
+        """
+        src = self._validate_input_para(src, self._table.columns)
+        to = self._validate_input_para(to, self._table.columns)
+        key = (src, to, bool(sparse))
+        try:
+            return self._concordances[key]
+        except KeyError:
+            pass
+
+        src_labels, src_region = self._get_regions(src)
+        to_labels, to_region = self._get_regions(to)
+        both = (src_region >= 0) & (to_region >= 0)
+        shape = (len(src_labels), len(to_labels))
+        if sparse:
+            import scipy.sparse
+            matrix = scipy.sparse.csr_matrix(
+                (np.ones(both.sum(), dtype=np.int8),
+                 (src_region[both], to_region[both])), shape=shape)
+            # duplicated pairs are summed up by the constructor
+            matrix.data[:] = 1
+        else:
+            matrix = np.zeros(shape, dtype=np.int8)
+            matrix[src_region[both], to_region[both]] = 1
+            matrix.flags.writeable = False
+        self._concordances[key] = Concordance(matrix, src_labels, to_labels)
+        return self._concordances[key]
+
+    def _get_regions(self, to):
+        """ Concordance between the rows of the country data and 'to'
+
+        Returns
+        -------
+        tuple (region_labels, row_region) with the distinct values of
+        column 'to' (in the order of the data) and the position of the
+        region of every row in region_labels (-1 for missing values)
+        """
+        try:
+            return self._regions[to]
+        except KeyError:
+            pass
+        region_labels = collections.OrderedDict()
+        row_region = np.array(
+            [-1 if _is_missing(value) else
+             region_labels.setdefault(value, len(region_labels))
+             for value in self._get_column(to)], dtype=np.intp)
+        self._regions[to] = (tuple(region_labels), row_region)
+        return self._regions[to]
+
+    def _match_names(self, names, src, exclude_prefix, n_jobs=1,
+                     stats=None):
+        """ Matches several names, optionally in parallel processes
+
+        Parameters
+        ----------
+
+        names : iterable of str
+
+        src, exclude_prefix :
+            See _match_name
+
+        n_jobs : int, optional
+            See convert
+
+        stats : _CallStats, optional
+            Receives the timings of the matching stages (only when
+            matching in this process)
+
+        Returns
+        -------
+
+        list of the _match_name results, in the order of names
+        """
+        if n_jobs == 0:
+            raise ValueError('n_jobs must not be 0')
+        if n_jobs is None or n_jobs == 1:
+            return [self._match_name(name, src, exclude_prefix, stats)
+                    for name in names]
+
+        if n_jobs < 0:
+            n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+
+        names = list(names)
+        matches = [self._name_cache.get((name, src, tuple(exclude_prefix)))
+                   for name in names]
+        missing = [ind for ind, match in enumerate(matches) if match is None]
+        if not missing:
+            return matches
+
+        # a few chunks per process to balance uneven regex costs
+        chunksize = -(-len(missing) // (4 * n_jobs))
+        chunks = [[names[ind] for ind in missing[start:start + chunksize]]
+                  for start in range(0, len(missing), chunksize)]
+        # multiprocessing.Pool (instead of ProcessPoolExecutor, which
+        # supports an initializer only from python 3.7) sends the data
+        # once to every process
+        import multiprocessing
+        with multiprocessing.Pool(min(n_jobs, len(chunks)), _init_worker,
+                                  (self,)) as pool:
+            chunk_results = pool.starmap(
+                _match_names_worker,
+                zip(chunks, itertools.repeat(src),
+                    itertools.repeat(exclude_prefix)))
+            for ind, match in zip(missing,
+                                  itertools.chain.from_iterable(
+                                      chunk_results)):
+                matches[ind] = match
+                self._name_cache.put(
+                    (names[ind], src, tuple(exclude_prefix)), match)
+        return matches
+
+    async def _amatch_names(self, names, src, exclude_prefix, executor=None):
+        """ Asyncio version of _match_names
+
+        Cached names are resolved directly, the remaining ones in one
+        batch in executor. Names which are already being matched for
+        another call are awaited instead of being matched again. The
+        batch does not belong to the call which started it: cancelling
+        a call does not cancel the matching for the other calls waiting
+        for the same names.
+
+        Returns
+        -------
+
+        list of the _match_name results, in the order of names
+        """
+        import asyncio
+        loop = asyncio.get_event_loop()
+        in_flight = self._in_flight.setdefault(loop, dict())
+        exclude_key = tuple(exclude_prefix)
+
+        matches = dict()
+        pending = dict()
+        batch = []
+        for name in names:
+            key = (name, src, exclude_key)
+            cached = self._name_cache.get(key)
+            if cached is not None:
+                matches[name] = cached
+            elif key in in_flight:
+                pending[name] = in_flight[key]
+            else:
+                in_flight[key] = pending[name] = loop.create_future()
+                batch.append(name)
+
+        if batch:
+            try:
+                batch_future = loop.run_in_executor(
+                    executor, self._match_names, batch, src, exclude_prefix)
+            except BaseException as excep:
+                self._resolve_in_flight(in_flight, batch, src, exclude_key,
+                                        excep=excep)
+                raise
+            batch_future.add_done_callback(
+                lambda done: self._resolve_in_flight(
+                    in_flight, batch, src, exclude_key, done))
+
+        for name, future in pending.items():
+            matches[name] = await asyncio.shield(future)
+
+        return [matches[name] for name in names]
+
+    def _resolve_in_flight(self, in_flight, batch, src, exclude_key,
+                           done=None, excep=None):
+        """ Passes the outcome of a batch of _amatch_names to its waiters
+
+        Parameters
+        ----------
 
-        add_data = [data_loader(df) for df in additional_data]
-        self.data = pd.concat([basic_df] + add_data, ignore_index=True,
-                              axis=0)
+        in_flight : dict
+            (name, src, exclude_key) -> future of the pending matches
 
-        test_for_unique_names(
-            self.data,
-            data_name='merged data - keep last one',
-            report_fun=logging.warning)
+        batch : list of str
+            Names of the batch
 
-        for name_entry in must_be_unique:
-            self.data.drop_duplicates(subset=[name_entry],
-                                      keep='last', inplace=True)
+        done : asyncio.Future, optional
+            Completed future of the batch
 
-        self.data.reset_index(drop=True, inplace=True)
-        self.regexes = [re.compile(entry, re.IGNORECASE)
-                        for entry in self.data.regex]
+        excep : BaseException, optional
+            Exception raised when starting the batch (instead of done)
+        """
+        results = None
+        if done is not None and not done.cancelled():
+            excep = done.exception()
+            if excep is None:
+                results = done.result()
+        for ind, name in enumerate(batch):
+            future = in_flight.pop((name, src, exclude_key))
+            if results is not None:
+                result = results[ind]
+                # results of a process pool executor are not cached yet
+                self._name_cache.put((name, src, exclude_key), result)
+                future.set_result(result)
+            elif isinstance(excep, Exception):
+                future.set_exception(excep)
+                # marks the exception as retrieved for the case that no
+                # call waits for this name anymore
+                future.exception()
+            else:
+                future.cancel()
 
-    def convert(self, names, src=None, to='ISO3', enforce_list=False,
-                not_found='not found',
-                exclude_prefix=['excl\\w.*', 'without', 'w/o']):
-        """ Convert names from a list to another list.
+    def __getstate__(self):
+        state = self._get_state()
+        state['cache_size'] = self._name_cache.maxsize
+        return state
 
-        Note
-        ----
-        A lot of the functionality can also be done directly in pandas
-        dataframes.
-        For example:
-        coco = CountryConverter()
-        names = ['USA', 'SWZ', 'PRI']
-        coco.data[coco.data['ISO3'].isin(names)][['ISO2', 'continent']]
+    def __setstate__(self, state):
+        self._init_caches(state['cache_size'])
+        self._set_state(state)
+
+    def _match_name(self, name, src, exclude_prefix, stats=None):
+        """ Finds the rows of the country data matching name
 
         Parameters
         ----------
-        names : str or list like
-            Countries in 'src' classification to convert
-            to 'to' classification
 
-        src : str, optional
-            Source classification. If None (default), each passed name is
-            checked if it is a number (assuming UNnumeric) or 2 (ISO2) or
-            3 (ISO3) characters long; for longer names 'regex' is assumed.
+        name : str
+            Name of the country/region to match.
 
-        to : str, optional
-            Output classification (valid index of the country_data.txt),
-            default: ISO3
+        src : str or None
+            Validated source classification. If None, the classification
+            is determined from the name.
 
-        enforce_list : boolean, optional
-            If True, enforces the output to be list (if only one name was
-            passed) or to be a list of lists (if multiple names were passed).
-            If False (default), the output will be a string (if only one name
-            was passed) or a list of str and/or lists (str if a one to one
-            matching, list otherwise).
+        exclude_prefix : list of valid regex strings
+            See convert
 
-        not_found : str, optional
-            Fill in value for none found entries. If None, keep the input value
-            (default: 'not found')
+        stats : _CallStats, optional
+            Receives the time of the stages and the counts
 
-        exclude_prefix : list of valid regex strings
-            List of indicators with negate the subsequent country/region.
-            These prefixes and everything following will not be converted.
-            E.g. 'Asia excluding China' becomes 'Asia' and
-            'China excluding Hong Kong' becomes 'China' prior to conversion
-            Default: ['excl\\w.*', 'without', 'w/o'])
+        Returns
+        -------
+
+        tuple (spec_name, src_format, row_ids) with
+            spec_name : name without the excluded part
+            src_format : classification used for matching
+            row_ids : tuple of matching row ids in data
+
+        """
+        cache_key = (name, src, tuple(exclude_prefix))
+        cached = self._name_cache.get(cache_key)
+        if cached is not None:
+            if stats is not None:
+                stats.cache_hits += 1
+            return cached
+
+        if stats is not None:
+            stats.lap()
+        spec_name = self._separate_exclude_cases(
+            name, exclude_prefix)['clean_name']
+        if stats is not None:
+            stats.lap('exclusion')
+
+        if src is None:
+            src_format, row_ids = self._get_code_formats().get(
+                self._code_key(spec_name), ('regex', None))
+        else:
+            src_format, row_ids = src, None
+        if stats is not None:
+            stats.lap('detection')
+            stats.src_formats[src_format] += 1
+
+        if row_ids is not None:
+            pass
+        elif src_format.lower() == 'regex':
+            row_ids = self._search_regexes(spec_name, stats)
+        else:
+            key = (self._code_key(spec_name)
+                   if self._table.is_int_column(src_format)
+                   else spec_name.casefold())
+            row_ids = self._get_code_index(src_format).get(key, [])
+        if stats is not None:
+            stats.lap('regex' if src_format.lower() == 'regex' else 'code')
+
+        result = (spec_name, src_format, tuple(row_ids))
+        self._name_cache.put(cache_key, result)
+        return result
+
+    def cache_info(self):
+        """ Statistics of the cache of resolved names
 
         Returns
         -------
-        list or str, depending on enforce_list
 
+        CacheInfo namedtuple (hits, misses, evictions, maxsize, currsize)
         """
-        # The list to tuple conversion is necessary for matlab interface
-        names = list(names) if (
-                isinstance(names, tuple) or
-                isinstance(names, set)) else names
+        return self._name_cache.info()
 
-        names = names if isinstance(names, list) else [names]
+    def cache_clear(self):
+        """ Empties the cache of resolved names and resets its statistics
+        """
+        self._name_cache.clear()
 
-        names = [str(n) for n in names]
+    def enable_stats(self, sample=1.0, callback=None):
+        """ Starts collecting timings and counts of the convert calls
 
-        outlist = names.copy()
+        For instrumented calls, the time of the stages (prepare, exclusion
+        splitting, source format detection, regex and code matching,
+        output) is taken per distinct name, the names per detected source
+        format are counted and the time of each tested regex is recorded.
+        Uninstrumented calls only increase a counter, so a small sample
+        can be left on in production. Enabling again restarts the
+        statistics.
 
-        to = [self._validate_input_para(to, self.data.columns)]
+        Parameters
+        ----------
 
-        exclude_split = {name: self._separate_exclude_cases(name,
-                                                            exclude_prefix)
-                         for name in names}
+        sample : float, optional
+            Fraction of the calls (convert and aconvert) which are
+            instrumented, chosen at random. Default: 1.0 (all)
 
-        for ind_names, current_name in enumerate(names):
-            spec_name = exclude_split[current_name]['clean_name']
+        callback : callable, optional
+            Called with the report (see stats) of every instrumented call
+        """
+        self._stats = _ConvertStats(sample, callback)
 
-            if src is None:
-                src_format = self._get_input_format_from_name(spec_name)
-            else:
-                src_format = self._validate_input_para(src, self.data.columns)
-
-            if src_format.lower() == 'regex':
-                result_list = []
-                for ind_regex, ccregex in enumerate(self.regexes):
-                    if ccregex.search(spec_name):
-                        result_list.append(
-                            self.data.ix[ind_regex, to].values[0])
-                    if len(result_list) > 1:
-                        logging.warning('More then one regular expression '
-                                        'match for {}'.format(spec_name))
+    def disable_stats(self):
+        """ Stops collecting statistics (see enable_stats) """
+        self._stats = None
 
-            else:
-                _match_col = self.data[src_format].astype(
-                    str).str.replace('\\..*', '')
+    def stats(self, n_patterns=10):
+        """ Statistics of the convert calls since enable_stats
 
-                result_list = [etr[0] for etr in
-                               self.data[_match_col.str.contains(
-                                    '^' + spec_name + '$', flags=re.IGNORECASE,
-                                    na=False)][to].values]
+        Names resolved from the cache of resolved names are only counted
+        as cache_hits. Stage 'match' is the matching time not attributed
+        to the stages of the single names (all of it with parallel or
+        asyncio matching).
 
-            if len(result_list) == 0:
-                logging.warning(
-                    '{} not found in {}'.format(spec_name, src_format))
-                _fillin = not_found or spec_name
-                outlist[ind_names] = [_fillin] if enforce_list else _fillin
-            else:
-                outlist[ind_names] = []
-                for etr in result_list:
-                    try:
-                        conv_etr = int(etr)
-                    except ValueError:
-                        conv_etr = etr
-                    outlist[ind_names].append(conv_etr)
+        Parameters
+        ----------
 
-                if len(outlist[ind_names]) == 1 and enforce_list is False:
-                    outlist[ind_names] = outlist[ind_names][0]
+        n_patterns : int, optional
+            Number of slowest regexes to report, default: 10
 
-        if (len(outlist) == 1) and not enforce_list:
-            return outlist[0]
-        else:
-            return outlist
+        Returns
+        -------
+
+        dict with
+            'calls', 'sampled_calls' : number of all/instrumented calls
+            'names', 'unique_names' : names (distinct per call) converted
+            'cache_hits' : distinct names found in the cache
+            'stage_time' : stage -> seconds
+            'src_formats' : source format -> number of matched names
+            'regex_tried', 'regex_matched' : tested/matching regexes
+            'slowest_patterns' : list of (regex, seconds, tests)
+        or None if statistics are not enabled
+        """
+        if self._stats is None:
+            return None
+        return self._stats.report(n_patterns)
 
     def EU28in(self, to='name_short'):
         """
@@ -408,9 +2506,7 @@ class CountryConverter():
         pandas dataframe
 
         """
-        if type(to) is str:
-            to = [to]
-        return self.data[self.data.EU < 2015][to]
+        return self._select_members('EU', 2014, to)
 
     def EU27in(self, to='name_short'):
         """
@@ -427,9 +2523,7 @@ class CountryConverter():
         pandas dataframe
 
         """
-        if isinstance(to, str):
-            to = [to]
-        return self.data[self.data.EU < 2013][to]
+        return self._select_members('EU', 2012, to)
 
     def OECDin(self, to='name_short'):
         """
@@ -446,9 +2540,7 @@ class CountryConverter():
         pandas dataframe
 
         """
-        if isinstance(to, str):
-            to = [to]
-        return self.data[self.data.OECD > 0][to]
+        return self._select_members('OECD', None, to)
 
     def UNin(self, to='name_short'):
         """
@@ -464,10 +2556,107 @@ class CountryConverter():
         -------
         pandas dataframe
 
+        """
+        return self._select_members('UN', None, to)
+
+    def _select_members(self, group, year, to):
+        """ DataFrame with the to columns of the members of group
+
+        Parameters
+        ----------
+        group : str
+            Membership group, see is_member
+
+        year : int or None
+            Members in this year, None for members in any year
+
+        to : str or list of str
+            Classifications of the returned DataFrame
         """
         if isinstance(to, str):
             to = [to]
-        return self.data[self.data.UNmember > 0][to]
+        key = (group, year)
+        if key not in self._member_rows:
+            accession = self._get_membership(group)
+            self._member_rows[key] = np.flatnonzero(
+                accession != _NOT_MEMBER if year is None else
+                accession <= year)
+        return self._table.to_dataframe(to, self._member_rows[key])
+
+    def _get_membership(self, group):
+        """ Accession year to group for every row of the data (cached)
+
+        Rows which are not member are set to _NOT_MEMBER.
+        """
+        try:
+            column = _MEMBERSHIP_GROUPS[group.upper()]
+        except KeyError:
+            raise KeyError('{} is not a valid membership group ({})'.format(
+                group, ', '.join(sorted(set(_MEMBERSHIP_GROUPS.values())))))
+        try:
+            return self._membership[column]
+        except KeyError:
+            pass
+        years = self._table.columns[column]
+        accession = np.where((years == _MISSING_INT) | (years <= 0),
+                             _NOT_MEMBER, years)
+        self._membership[column] = accession
+        return accession
+
+    def is_member(self, names, group, year=None, src=None,
+                  exclude_prefix=['excl\\w.*', 'without', 'w/o']):
+        """ Tests if countries are (were) member of a group
+
+        The accession years of all countries are prepared once per group,
+        the test is vectorized over names and years.
+
+        Only the accession years are part of the country data, exits are
+        not modelled: a country counts as member in all years since its
+        accession (e.g. is_member('GBR', 'EU', 2021) is True).
+
+        Parameters
+        ----------
+        names : str or list like
+            Countries in 'src' classification
+
+        group : str
+            Membership group: 'EU', 'EURO', 'OECD' or 'UN' (or the
+            corresponding column of the country data, e.g. 'UNmember')
+
+        year : int or list like of int, optional
+            Year of the membership, either one year for all names or one
+            year per name (membership means accession in or before this
+            year). If None (default), membership at any time.
+
+        src : str, optional
+            Source classification, see convert
+
+        exclude_prefix : list of valid regex strings
+            See convert
+
+        Returns
+        -------
+        bool (for a single name and year) or numpy array of bool.
+        Names which are not found are not member; for names matching
+        several countries the earliest accession counts.
+
+        """
+        scalar = isinstance(names, str) and np.ndim(year) == 0
+        accession = self._get_membership(group)
+        unique_names, name_codes, src, _ = self._prepare_convert(
+            names, src, [])
+        unique_accession = np.array(
+            [min((accession[row] for row in row_ids), default=_NOT_MEMBER)
+             for _, _, row_ids in self._match_names(
+                 unique_names, src, exclude_prefix)],
+            dtype=np.int64)
+        name_accession = unique_accession[np.array(name_codes,
+                                                   dtype=np.intp)]
+        if year is None:
+            member = name_accession != _NOT_MEMBER
+        else:
+            member = name_accession <= np.asarray(year)
+        return bool(member[0]) if scalar else member
 
     @property
     def EU28(self):
@@ -500,7 +2689,7 @@ class CountryConverter():
     @property
     def valid_class(self):
         """ Valid strings for the converter """
-        return list(self.data.columns)
+        return list(self._table.columns)
 
     def _validate_input_para(self, para, column_names):
         """ Convert the input classificaton para to the correct df column name
@@ -539,30 +2728,624 @@ class CountryConverter():
 
         return validated_para
 
-    def _get_input_format_from_name(self, name):
-        """ Determines the input format based on the given country name
+    def _build_regex_prefilter(self):
+        """ Buckets the regular expressions by the trigrams they require
+
+        For every regex a set of literals is determined of which at least
+        one must be part of any matching name. The regex is then filed
+        under the first three characters of each of these literals.
+        Regexes without such literals are always tested.
+        """
+        self._regex_buckets = dict()
+        unfiltered = []
+        for ind_regex, pattern in enumerate(self._regex_patterns):
+            try:
+                cover = self._regex_covers[pattern]
+            except KeyError:
+                try:
+                    cover = _regex_literal_cover(
+                        sre_parse.parse(pattern, re.IGNORECASE))
+                except Exception:
+                    cover = None
+                self._regex_covers[pattern] = cover
+            if cover is None:
+                unfiltered.append(ind_regex)
+                continue
+            for literal in cover:
+                self._regex_buckets.setdefault(
+                    literal[:3], set()).add(ind_regex)
+        self._regex_unfiltered = frozenset(unfiltered)
+
+    def _search_regexes(self, name, stats=None):
+        """ Row ids of all regular expressions matching name
+
+        Only regexes which can match based on the trigrams in name
+        are tested (see _build_regex_prefilter). Non ascii names are
+        tested against all regexes, since case folding could
+        map them to literals of the regexes.
+
+        Parameters
+        ----------
+
+        name : str
+
+        stats : _CallStats, optional
+            Receives the number of tested and matching regexes and the
+            time per regex
+
+        Returns
+        -------
+
+        list of int : ids of the matching regexes in ascending order
+        """
+        if not _NON_ASCII.search(name):
+            lower_name = name.lower()
+            candidates = sorted(self._regex_unfiltered.union(
+                *[self._regex_buckets.get(lower_name[pos:pos + 3], ())
+                  for pos in range(len(lower_name) - 2)]))
+        else:
+            candidates = range(len(self._regex_patterns))
+
+        compiled = self._compiled_regexes
+        if stats is None:
+            return [ind_regex for ind_regex in candidates
+                    if (compiled[ind_regex] or
+                        self._get_regex(ind_regex)).search(name)]
+
+        matching = []
+        for ind_regex in candidates:
+            regex = compiled[ind_regex] or self._get_regex(ind_regex)
+            start = time.perf_counter()
+            found = regex.search(name)
+            pattern = self._regex_patterns[ind_regex]
+            stats.pattern_time[pattern] += time.perf_counter() - start
+            stats.pattern_tests[pattern] += 1
+            if found:
+                matching.append(ind_regex)
+        stats.regex_tried += len(candidates)
+        stats.regex_matched += len(matching)
+        return matching
+
+    def _setup_regexes(self):
+        """ Prepares the lazy compilation of the regexes of the data """
+        # missing regexes never match
+        if self._table.is_shared('regex'):
+            self._regex_patterns = _ColumnView(self._table.columns['regex'],
+                                               '(?!)')
+        else:
+            self._regex_patterns = [
+                entry if entry is not None else '(?!)'
+                for entry in self._table.entries('regex')]
+        self._compiled_regexes = [None] * len(self._regex_patterns)
+
+    def _get_regex(self, ind_regex):
+        """ Compiled regular expression of row ind_regex of the data
+
+        Regexes are compiled on first use, since most names only need
+        a small subset of them (see _search_regexes).
+        """
+        ccregex = self._compiled_regexes[ind_regex]
+        if ccregex is None:
+            pattern = self._regex_patterns[ind_regex]
+            ccregex = self._regex_cache.get(pattern)
+            if ccregex is None:
+                ccregex = re.compile(pattern, re.IGNORECASE)
+                self._regex_cache[pattern] = ccregex
+            self._compiled_regexes[ind_regex] = ccregex
+        return ccregex
+
+    @property
+    def regexes(self):
+        """ Compiled regular expressions, in the order of the data rows """
+        return [self._get_regex(ind_regex)
+                for ind_regex in range(len(self._regex_patterns))]
+
+    def _get_code_index(self, src_format):
+        """ Lookup index for the classification src_format
+
+        The index is build on first use and kept for the lifetime of the
+        converter.
 
         Parameters
         ----------
 
-        name : string
+        src_format : string
+            Valid column name of the country data
+
+        Returns
+        -------
+
+        dict : case folded code (str) -> list of row ids in data
+        """
+        try:
+            return self._code_index[src_format]
+        except KeyError:
+            pass
+
+        index = dict()
+        self._add_to_code_index(index, src_format,
+                                range(self._table.n_rows))
+        self._code_index[src_format] = index
+        return index
+
+    def _add_to_code_index(self, index, src_format, row_ids):
+        """ Adds the codes of the rows row_ids to the code index """
+        is_int = self._table.is_int_column(src_format)
+        if is_int:
+            codes = self._table.columns[src_format]
+        else:
+            codes = self._table.entries(src_format)
+        for row_id in row_ids:
+            code = codes[row_id]
+            if is_int:
+                code = None if code == _MISSING_INT else str(code)
+            if code is not None:
+                index.setdefault(code.casefold(), []).append(row_id)
+
+    def _get_code_formats(self):
+        """ Combined code index for the detection of the source format
+
+        Built on first use from the code indexes of the classifications
+        in _DETECTED_FORMATS.
 
         Returns
         -------
 
-        string : valid input format
+        dict : case folded code -> (classification, row ids)
+        """
+        if self._code_formats is None:
+            code_formats = dict()
+            for src_format in _DETECTED_FORMATS:
+                if src_format not in self._table.columns:
+                    continue
+                for code, row_ids in self._get_code_index(
+                        src_format).items():
+                    code_formats.setdefault(code,
+                                            (src_format, tuple(row_ids)))
+            self._code_formats = code_formats
+        return self._code_formats
+
+    @staticmethod
+    def _code_key(name):
+        """ Key of name in the code indexes
+
+        Integer numbers are normalized (e.g. '040' to '40'), all other
+        names are case folded.
         """
         try:
-            int(name)
-            src_format = 'ISOnumeric'
+            return str(int(name))
+        except ValueError:
+            return name.casefold()
+
+
+class _ColumnView():
+    """ Sequence of the values of a read-only column array
+
+    Gives the values of a str or int64 array (see _CountryTable) as
+    Python objects, missing values ('' or _MISSING_INT) as missing. Used
+    for the columns attached from a ConverterSnapshot, which are indexed
+    directly instead of being copied to a list in every process.
+    """
+
+    __slots__ = ('array', 'missing')
+
+    def __init__(self, array, missing):
+        self.array = array
+        self.missing = missing
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, row_id):
+        value = self.array[row_id].item()
+        if value == '' or value == _MISSING_INT:
+            return self.missing
+        return value
+
+    def __iter__(self):
+        for row_id in range(len(self.array)):
+            yield self[row_id]
+
+
+class _SharedIndex(collections.abc.Mapping):
+    """ Read-only code index on the arrays of a ConverterSnapshot
+
+    Parameters
+    ----------
+
+    codes : numpy str array
+        Sorted (case folded) codes
+
+    starts : numpy int64 array
+        Start of the row ids of each code in row_ids, followed by the end
+        of the last one
+
+    row_ids : numpy int64 array
+        Row ids of all codes
+
+    labels : numpy str array, optional
+        Classification of each code. If given, the values are tuples
+        (classification, row ids) as in _get_code_formats, otherwise
+        lists of row ids as in _get_code_index.
+    """
+
+    def __init__(self, codes, starts, row_ids, labels=None):
+        self.codes = codes
+        self.starts = starts
+        self.row_ids = row_ids
+        self.labels = labels
+
+    def __getitem__(self, code):
+        pos = int(np.searchsorted(self.codes, code))
+        if pos == len(self.codes) or self.codes[pos] != code:
+            raise KeyError(code)
+        row_ids = self.row_ids[self.starts[pos]:self.starts[pos + 1]].tolist()
+        if self.labels is None:
+            return row_ids
+        return self.labels[pos].item(), tuple(row_ids)
+
+    def __iter__(self):
+        return iter(self.codes.tolist())
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def _index_arrays(index):
+    """ Arrays (codes, starts, row_ids) of a code index for _SharedIndex
+
+    The codes of index are taken in sorted order.
+    """
+    codes = sorted(index)
+    return [np.array(codes, dtype=str),
+            np.cumsum([0] + [len(index[code]) for code in codes],
+                      dtype=np.int64),
+            np.array(list(itertools.chain.from_iterable(
+                index[code] for code in codes)), dtype=np.int64)]
+
+
+# Identification of the snapshot format, see ConverterSnapshot
+_SNAPSHOT_MAGIC = b'COCOSNAP'
+_SNAPSHOT_FORMAT = 2
+
+# Shared memory blocks created by this process (see to_shared_memory)
+_CREATED_SHARED_MEMORY = set()
+
+
+class ConverterSnapshot():
+    """ Immutable serialization of the data of a CountryConverter
+
+    The snapshot is one contiguous buffer with a JSON header, the data
+    table (integer columns as int64 arrays, text columns as fixed width
+    unicode arrays), the code indexes of the ISO and UN codes and the
+    regex prefilter. It can be written to a file or to shared memory and
+    attached by other processes: the converters created from an attached
+    snapshot use read-only numpy views of the buffer for the table and
+    the code indexes, so all processes share one copy of them. The
+    compiled regexes, the regex prefilter and the indexes of other
+    classifications are kept per process.
+
+    Snapshots are hashable, two snapshots are equal if their content is
+    equal.
+
+    Use CountryConverter.freeze to create a snapshot and open_file or
+    open_shared_memory to attach one.
+
+    Parameters
+    ----------
+
+    buffer : bytes-like
+        Serialized snapshot (as created by from_converter)
+
+    owner : object, optional
+        Object which must be kept alive as long as the buffer is used
+        (e.g. the mmap or SharedMemory the buffer belongs to)
+    """
+
+    def __init__(self, buffer, owner=None):
+        view = memoryview(buffer).cast('B')
+        if bytes(view[:len(_SNAPSHOT_MAGIC)]) != _SNAPSHOT_MAGIC:
+            raise ValueError('Buffer does not contain a converter snapshot')
+        start = len(_SNAPSHOT_MAGIC) + 8
+        header_length = int.from_bytes(view[start - 8:start], 'little')
+        try:
+            header = json.loads(
+                bytes(view[start:start + header_length]).decode('utf-8'))
         except ValueError:
-            if len(name) == 2:
-                src_format = 'ISO2'
-            elif len(name) == 3:
-                src_format = 'ISO3'
+            raise ValueError('Snapshot header can not be read')
+        if not isinstance(header, dict):
+            raise ValueError('Snapshot header can not be read')
+        if header.get('format') != _SNAPSHOT_FORMAT:
+            raise ValueError('Snapshot format {} is not supported'.format(
+                header.get('format')))
+        payload_start = start + header_length
+        self._header = header
+        self._payload = view[payload_start:payload_start + header['size']]
+        self._view = view
+        self._owner = owner
+        self.key = header['key']
+
+    @classmethod
+    def from_converter(cls, converter):
+        """ Snapshot of the data of converter """
+        table = converter._table
+        arrays = []
+        columns = []
+        for name in table.columns:
+            if table.is_int_column(name):
+                array = np.ascontiguousarray(table.columns[name],
+                                             dtype=np.int64)
             else:
-                src_format = 'regex'
-        return src_format
+                array = np.array(['' if entry is None else entry
+                                  for entry in table.entries(name)],
+                                 dtype=str)
+            columns.append((name, len(arrays)))
+            arrays.append(array)
+
+        trigrams = sorted(converter._regex_buckets)
+        bucket_ids = [sorted(converter._regex_buckets[trigram])
+                      for trigram in trigrams]
+        arrays.append(np.array(trigrams, dtype='U3'))
+        arrays.append(np.cumsum([0] + [len(ids) for ids in bucket_ids],
+                                dtype=np.int64))
+        arrays.append(np.array(list(itertools.chain.from_iterable(
+            bucket_ids)), dtype=np.int64))
+        arrays.append(np.array(sorted(converter._regex_unfiltered),
+                               dtype=np.int64))
+
+        indexes = []
+        for src_format in _DETECTED_FORMATS:
+            if src_format in table.columns:
+                index = converter._get_code_index(src_format)
+                indexes.append((src_format, len(arrays)))
+                arrays.extend(_index_arrays(index))
+        code_formats = converter._get_code_formats()
+        codes = sorted(code_formats)
+        arrays.extend(_index_arrays(collections.OrderedDict(
+            (code, code_formats[code][1]) for code in codes)))
+        arrays.append(np.array([code_formats[code][0] for code in codes],
+                               dtype=str))
+
+        layout = []
+        size = 0
+        for array in arrays:
+            size = -(-size // 8) * 8
+            layout.append((size, array.dtype.str, len(array)))
+            size += array.nbytes
+        payload = bytearray(size)
+        for (offset, _, _), array in zip(layout, arrays):
+            payload[offset:offset + array.nbytes] = array.tobytes()
+
+        header = {'format': _SNAPSHOT_FORMAT,
+                  'version': __version__,
+                  'key': hashlib.sha256(payload).hexdigest(),
+                  'size': size,
+                  'messages': list(converter._data_messages),
+                  'columns': [(name, layout[ind]) for name, ind in columns],
+                  'regex_buckets': layout[len(columns):len(columns) + 3],
+                  'regex_unfiltered': layout[len(columns) + 3],
+                  'code_index': [(src_format, layout[ind:ind + 3])
+                                 for src_format, ind in indexes],
+                  'code_formats': layout[-4:]}
+        header = json.dumps(header).encode('utf-8')
+        header += b' ' * (-len(header) % 8)
+        return cls(_SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') +
+                   header + payload)
+
+    @classmethod
+    def open_file(cls, path):
+        """ Attaches the snapshot in file path (memory mapped, read-only) """
+        import mmap
+        with open(path, 'rb') as snapshot_file:
+            mapped = mmap.mmap(snapshot_file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        return cls(mapped, owner=mapped)
+
+    @classmethod
+    def open_shared_memory(cls, name):
+        """ Attaches the snapshot in the shared memory block name """
+        from multiprocessing import shared_memory
+        try:
+            # the creating process is responsible for the unlinking
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:   # python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+            if (os.name == 'posix' and
+                    shm.name not in _CREATED_SHARED_MEMORY):
+                # otherwise the resource tracker of this process unlinks
+                # the block when the process exits
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm.buf, owner=shm)
+
+    def to_file(self, path):
+        """ Writes the snapshot to path (for open_file) """
+        with open(path, 'wb') as snapshot_file:
+            snapshot_file.write(self._view)
+
+    def to_shared_memory(self, name=None):
+        """ Copies the snapshot to a new shared memory block
+
+        Parameters
+        ----------
+
+        name : str, optional
+            Name of the block, default: a new unique name
+
+        Returns
+        -------
+
+        multiprocessing.shared_memory.SharedMemory
+            The block, its name is passed to open_shared_memory. The
+            caller has to unlink the block when it is not needed anymore.
+        """
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=len(self._view))
+        shm.buf[:len(self._view)] = self._view
+        _CREATED_SHARED_MEMORY.add(shm.name)
+        return shm
+
+    def _array(self, layout):
+        """ Read-only numpy view of an array of the payload """
+        offset, dtype, length = layout
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        array = np.frombuffer(self._payload, dtype=dtype, count=length,
+                              offset=offset)
+        array.flags.writeable = False
+        return array
+
+    def converter(self, cache_size=4096):
+        """ CountryConverter using the data of the snapshot
+
+        Parameters
+        ----------
+
+        cache_size: int, optional
+            See CountryConverter
+
+        Returns
+        -------
+
+        CountryConverter
+        """
+        header = self._header
+        converter = object.__new__(CountryConverter)
+        converter._init_caches(cache_size)
+        converter._data_messages = list(header['messages'])
+        converter._table = _CountryTable(collections.OrderedDict(
+            (name, self._array(layout))
+            for name, layout in header['columns']))
+        converter._data_frame = None
+        converter._setup_regexes()
+
+        trigrams, starts, ids = [self._array(layout)
+                                 for layout in header['regex_buckets']]
+        starts, ids = starts.tolist(), ids.tolist()
+        converter._regex_buckets = dict(
+            (trigram, set(ids[starts[ind]:starts[ind + 1]]))
+            for ind, trigram in enumerate(trigrams.tolist()))
+        converter._regex_unfiltered = frozenset(
+            self._array(header['regex_unfiltered']).tolist())
+        for src_format, layouts in header['code_index']:
+            converter._code_index[src_format] = _SharedIndex(
+                *[self._array(layout) for layout in layouts])
+        converter._code_formats = _SharedIndex(
+            *[self._array(layout) for layout in header['code_formats']])
+        converter._snapshot = self
+        return converter
+
+    def __len__(self):
+        return len(self._view)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConverterSnapshot):
+            return NotImplemented
+        return self.key == other.key
+
+
+# Converter of a worker process of CountryConverter._match_names
+_WORKER_CONVERTER = None
+
+
+def _init_worker(converter):
+    """ Keeps the converter passed once to a worker process """
+    global _WORKER_CONVERTER
+    _WORKER_CONVERTER = converter
+
+
+def _match_names_worker(names, src, exclude_prefix):
+    """ Matches names in a worker process (see _match_names) """
+    return [_WORKER_CONVERTER._match_name(name, src, exclude_prefix)
+            for name in names]
+
+
+class _CocoSeriesAccessor():
+    """ Country conversion of a pandas Series (series.coco.convert) """
+
+    def __init__(self, series):
+        self._series = series
+
+    def convert(self, src=None, to='ISO3', converter=None, **kargs):
+        """ Converts the series, see CountryConverter.convert_series
+
+        Parameters
+        ----------
+        src, to : str, optional
+            See CountryConverter.convert_series
+
+        converter : CountryConverter, optional
+            Converter to use, default: the shared converter
+            (see get_default_converter)
+
+        **kargs :
+            Passed to CountryConverter.convert_series
+        """
+        converter = converter or get_default_converter()
+        return converter.convert_series(self._series, src=src, to=to,
+                                        **kargs)
+
+
+class _CocoDataFrameAccessor():
+    """ Country conversion of DataFrame columns (df.coco.convert) """
+
+    def __init__(self, df):
+        self._df = df
+
+    def convert(self, column, src=None, to='ISO3', converter=None, **kargs):
+        """ Converts a column, see CountryConverter.convert_series
+
+        Parameters
+        ----------
+        column : label
+            Column of the DataFrame with the names to convert
+
+        src, to : str, optional
+            See CountryConverter.convert_series
+
+        converter : CountryConverter, optional
+            Converter to use, default: the shared converter
+            (see get_default_converter)
+
+        **kargs :
+            Passed to CountryConverter.convert_series
+        """
+        converter = converter or get_default_converter()
+        return converter.convert_series(self._df[column], src=src, to=to,
+                                        **kargs)
+
+
+_ACCESSORS_REGISTERED = False
+
+
+def register_pandas_accessors():
+    """ Registers the .coco accessor for pandas Series and DataFrames
+
+    This is done automatically when coco is imported after pandas or when
+    coco uses pandas for the first time. Call this function if pandas is
+    imported after coco and the accessor is needed before any other pandas
+    functionality of coco.
+    """
+    global _ACCESSORS_REGISTERED
+    if _ACCESSORS_REGISTERED:
+        return
+    import pandas as pd
+    _ACCESSORS_REGISTERED = True
+    try:
+        pd.api.extensions.register_series_accessor('coco')(
+            _CocoSeriesAccessor)
+        pd.api.extensions.register_dataframe_accessor('coco')(
+            _CocoDataFrameAccessor)
+    except AttributeError:  # pandas < 0.23
+        pass
+
+
+if 'pandas' in sys.modules:
+    register_pandas_accessors()
 
 
 def _parse_arg(valid_classifications):
@@ -616,21 +3399,121 @@ def _parse_arg(valid_classifications):
                               'utf-8 encoded tab separated data, same '
                               'column headers as in the general country '
                               'data file; default: not found)'))
+    parser.add_argument('-i', '--input',
+                        help=('Read the names from this file instead of '
+                              'the command line, one name per line '
+                              '("-" for stdin). The converted names are '
+                              'written line by line to stdout.'))
+    parser.add_argument('-c', '--column',
+                        help=('Column of the input file with the names, '
+                              'either the name of the column (the first '
+                              'line is then the header) or its position '
+                              '(starting at 0, no header). If given, the '
+                              'input is read as delimited file.'))
+    parser.add_argument('-d', '--delimiter',
+                        help=('Delimiter of the input file for --column '
+                              '(default: tab for .tsv/.tab/.txt files, '
+                              'comma otherwise)'))
+    parser.add_argument('--chunksize', type=int, default=10000,
+                        help=('Number of input lines converted at once '
+                              '(default: 10000)'))
 
     args = parser.parse_args()
     args.src = args.src or None
     args.to = args.to or 'ISO3'
     args.not_found = args.not_found if args.not_found != 'None' else None
     args.output_sep = args.output_sep or ' '
+    if args.input and args.names:
+        parser.error('names can not be combined with --input')
+    if args.chunksize < 1:
+        parser.error('--chunksize must be at least 1')
+    if not args.delimiter:
+        args.delimiter = '\t' if os.path.splitext(
+            args.input or '')[1].lower() in ['.tsv', '.tab', '.txt'] else ','
+    if args.delimiter == '\\t':
+        args.delimiter = '\t'
 
     return args
 
 
+def _convert_stream(coco, infile, outfile, src=None, to='ISO3',
+                    not_found='not found', column=None, delimiter=',',
+                    chunksize=10000):
+    """ Converts the names of a file line by line
+
+    The file is processed in chunks, so the memory use is independent of
+    the file size. Every input line gives one output line.
+
+    Parameters
+    ----------
+
+    coco : CountryConverter
+
+    infile, outfile : file objects (text mode)
+
+    src, to, not_found :
+        See CountryConverter.convert
+
+    column : str or int, optional
+        If None (default), every line is a name. Otherwise the input is
+        read as delimited file and the names are taken from this column,
+        given as column name (first line is header, the output then
+        starts with the 'to' classification as header) or position.
+
+    delimiter : str, optional
+        Delimiter for column, default ','
+
+    chunksize : int, optional
+        Number of lines converted at once, default 10000
+    """
+    if column is None:
+        names = (line.rstrip('\r\n') for line in infile)
+    else:
+        rows = csv.reader(infile, delimiter=delimiter)
+        try:
+            col_ind = int(column)
+        except ValueError:
+            header = next(rows, [])
+            if column not in header:
+                raise KeyError('Column {} not found in the input'.format(
+                    column))
+            col_ind = header.index(column)
+            outfile.write(to + '\n')
+        names = (row[col_ind] if len(row) > col_ind else '' for row in rows)
+
+    while True:
+        chunk = list(itertools.islice(names, chunksize))
+        if not chunk:
+            break
+        converted = coco.convert(chunk, src=src, to=to, enforce_list=False,
+                                 not_found=not_found)
+        if len(chunk) == 1:
+            converted = [converted]
+        outfile.write(''.join(str(etr) + '\n' for etr in converted))
+        outfile.flush()
+
+
 def main():
     """ Main entry point - used for command line call
     """
-    args = _parse_arg(CountryConverter().valid_class)
+    with open(COUNTRY_DATA_FILE, encoding='utf-8') as cf:
+        valid_classifications = cf.readline().rstrip('\r\n').split('\t')
+    args = _parse_arg(valid_classifications)
     coco = CountryConverter(additional_data=args.additional_data)
+
+    if args.input:
+        infile = (sys.stdin if args.input == '-' else
+                  open(args.input, encoding='utf-8', newline=''))
+        try:
+            _convert_stream(coco, infile, sys.stdout, src=args.src,
+                            to=args.to, not_found=args.not_found,
+                            column=args.column, delimiter=args.delimiter,
+                            chunksize=args.chunksize)
+        finally:
+            if infile is not sys.stdin:
+                infile.close()
+        return
+
     converted_names = coco.convert(
         names=args.names,
         src=args.src,
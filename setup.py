@@ -19,7 +19,8 @@ setup(
     entry_points={
         'console_scripts':
         ['coco = country_converter.country_converter:main']},
-    install_requires=['pandas >= 0.17.0'],
+    install_requires=['numpy', 'pandas >= 0.17.0'],
+    extras_require={'sparse': ['scipy']},
     classifiers=[
           'Development Status :: 4 - Beta',
           'Environment :: Console',
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmpdir, monkeypatch):
+    """ Keeps cached data artifacts of the tests out of the user cache """
+    monkeypatch.setenv('COCO_CACHE_DIR', str(tmpdir.join('coco_cache')))
@@ -130,3 +130,538 @@ def test_additional_country_data():
                                                        to='name_short')
     assert pd.np.nan is converter_extended.convert('XXX', src='ISO3',
                                                    to='continent')
+
+
+def test_code_lookup():
+    converter = coco.CountryConverter()
+    assert converter.convert('at', src='ISO2', to='ISO3') == 'AUT'
+    assert converter.convert('aut', src='ISO3', to='ISO2') == 'AT'
+    assert converter.convert(40, src='ISOnumeric', to='ISO3') == 'AUT'
+    assert converter.convert('40', src='UNcode', to='ISO3') == 'AUT'
+    assert converter.convert(['AUT', 'XXX'], src='ISO3',
+                             to='ISOnumeric') == [40, 'not found']
+    assert 'AUT' in converter.convert('Europe', src='continent', to='ISO3')
+
+
+def test_repeated_names():
+    converter = coco.CountryConverter()
+    names = ['Austria', 'USA', 'Austria', 'XXXX', 'USA']
+    assert converter.convert(names, to='ISO2') == [
+        'AT', 'US', 'AT', 'not found', 'US']
+    result = converter.convert(names, to='ISO2', enforce_list=True)
+    assert result[0] == result[2] == ['AT']
+    assert result[0] is not result[2]
+
+
+def test_regex_prefilter(get_regex_test_data):
+    converter = coco.CountryConverter()
+    for name_test in get_regex_test_data.data.name_test:
+        assert converter._search_regexes(name_test) == [
+            ind for ind, regex in enumerate(converter.regexes)
+            if regex.search(name_test)]
+
+
+def test_name_cache():
+    converter = coco.CountryConverter(cache_size=2)
+    converter.convert(['Austria', 'USA'])
+    assert converter.cache_info().misses == 2
+    assert converter.convert(['USA', 'Austria'], to='ISO2') == ['US', 'AT']
+    assert converter.cache_info().hits == 2
+    converter.convert('Germany')
+    info = converter.cache_info()
+    assert (info.evictions, info.currsize, info.maxsize) == (1, 2, 2)
+    converter.cache_clear()
+    assert converter.cache_info().currsize == 0
+
+    uncached = coco.CountryConverter(cache_size=0)
+    assert uncached.convert(['Austria', 'Austria']) == ['AUT', 'AUT']
+    assert uncached.cache_info().currsize == 0
+
+
+def test_cached_data(tmpdir, monkeypatch):
+    monkeypatch.setenv('COCO_CACHE_DIR', str(tmpdir))
+    coco.CountryConverter(additional_data=custom_data)
+    assert tmpdir.listdir() == []
+
+    stale = tmpdir.join('country_data_0.0.1_1_abc.pickle')
+    stale.write('')
+    artifact = coco.build_cache(additional_data=custom_data)
+    assert os.path.dirname(artifact) == str(tmpdir)
+    assert not stale.exists()
+
+    cached = coco.CountryConverter(additional_data=custom_data)
+    uncached = coco.CountryConverter(additional_data=custom_data,
+                                     use_cache=False)
+    assert cached.data.equals(uncached.data)
+    assert 'ISO3' in cached._code_index
+    assert cached.convert(['Congo', 'wirtland', 'AT'], to='name_short') == [
+        'DR Congo', 'Wirtland', 'Austria']
+
+    with open(artifact, 'wb') as af:
+        af.write(b'corrupted')
+    assert coco.CountryConverter(
+        additional_data=custom_data).convert('Congo') == 'COD'
+
+
+def test_default_converter():
+    coco.reset_default_converter()
+    default = coco.get_default_converter()
+    assert coco.get_default_converter() is default
+    assert coco.convert('Austria', to='ISO2') == 'AT'
+    assert default.cache_info().misses == 1
+
+    extended = coco.get_default_converter(additional_data=custom_data)
+    assert extended is not default
+    assert coco.convert('Congo', additional_data=custom_data) == 'COD'
+    assert coco.match(['Congo'], ['Republic of Congo', 'DR Congo'],
+                      additional_data=custom_data) == {'Congo': 'DR Congo'}
+    assert coco.match(['Congo'], ['Republic of Congo', 'DR Congo']) == {
+        'Congo': 'Republic of Congo'}
+
+    coco.reset_default_converter()
+    assert coco.get_default_converter() is not default
+
+
+def test_convert_series():
+    converter = coco.CountryConverter()
+    names = pd.Series(['Austria', 'USA', None, 'XXXX', 'AT', 'Austria'],
+                      index=list('abcdef'))
+    iso3 = converter.convert_series(names)
+    assert list(iso3.index) == list('abcdef')
+    assert iso3.name == 'ISO3'
+    assert iso3.iloc[[0, 1, 3, 4, 5]].tolist() == [
+        'AUT', 'USA', 'not found', 'AUT', 'AUT']
+    assert pd.isnull(iso3['c'])
+
+    multi = converter.convert_series(names, to=['ISO2', 'UNcode'],
+                                     categorical=True)
+    assert list(multi.columns) == ['ISO2', 'UNcode']
+    assert multi['ISO2'].dtype.name == 'category'
+    assert multi.loc['a'].tolist() == ['AT', 40]
+
+    df = pd.DataFrame({'country': names})
+    assert df.coco.convert('country', to='ISO2').tolist() == (
+        names.coco.convert(to='ISO2', converter=converter).tolist())
+
+
+def test_multiple_to():
+    converter = coco.CountryConverter()
+    to = ['ISO3', 'continent', 'UNcode']
+    assert converter.convert('Austria', to=to) == ('AUT', 'Europe', 40)
+    assert converter.convert(['Austria', 'XXXX'], to=to) == [
+        ('AUT', 'Europe', 40), ('not found', 'not found', 'not found')]
+    assert converter.convert('Austria', to=to, enforce_list=True) == [
+        (['AUT'], ['Europe'], [40])]
+    assert converter.cache_info().misses == 2
+
+
+def test_convert_stream(monkeypatch):
+    import io
+    from country_converter.country_converter import _convert_stream, main
+    converter = coco.CountryConverter()
+
+    outfile = io.StringIO()
+    _convert_stream(converter, io.StringIO('Austria\nUSA\nXXXX\nDE\n'),
+                    outfile, to='ISO2', chunksize=3)
+    assert outfile.getvalue() == 'AT\nUS\nnot found\nDE\n'
+
+    outfile = io.StringIO()
+    _convert_stream(converter,
+                    io.StringIO('id,country\n1,Austria\n2,"Korea, Rep."\n'),
+                    outfile, column='country')
+    assert outfile.getvalue() == 'ISO3\nAUT\nKOR\n'
+
+    outfile = io.StringIO()
+    _convert_stream(converter, io.StringIO('1\tAustria\n'), outfile,
+                    column=1, delimiter='\t')
+    assert outfile.getvalue() == 'AUT\n'
+
+    monkeypatch.setattr('sys.argv', ['coco', '--input', 'names.txt',
+                                     '--chunksize', '0'])
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_parallel_conversion():
+    converter = coco.CountryConverter()
+    names = ['Austria', 'USA', 'XXXX', 'Korea, Rep.', 'DE'] * 3
+    expected = coco.CountryConverter().convert(names, to='ISO2')
+    assert converter.convert(names, to='ISO2', n_jobs=2) == expected
+    assert converter.cache_info().currsize == 5
+    assert converter.convert(names, to='ISO2', n_jobs=2) == expected
+    assert coco.match(['Austria', 'Germany'], ['AUT Austria', 'Germany'],
+                      n_jobs=2) == {'Austria': 'AUT Austria',
+                                    'Germany': 'Germany'}
+    with pytest.raises(ValueError):
+        converter.convert(['Austria', 'Chad'], n_jobs=0)
+
+
+def test_async_conversion():
+    import asyncio
+    converter = coco.CountryConverter()
+
+    async def convert_concurrently():
+        return await asyncio.gather(
+            converter.aconvert(['Austria', 'USA'], to='ISO2'),
+            converter.aconvert(['USA', 'Germany'], to='ISO2'),
+            coco.amatch(['Austria'], ['AUT Austria', 'Germany']))
+
+    loop = asyncio.new_event_loop()
+    try:
+        iso2_a, iso2_b, matched = loop.run_until_complete(
+            convert_concurrently())
+        assert iso2_a == ['AT', 'US']
+        assert iso2_b == ['US', 'DE']
+        assert matched == {'Austria': 'AUT Austria'}
+        # USA was matched only once for both calls
+        assert converter.cache_info().currsize == 3
+        assert loop.run_until_complete(
+            converter.aconvert('Austria')) == 'AUT'
+        assert converter.cache_info().hits >= 1
+
+        # names matched in another process are cached in this one
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(1) as executor:
+            assert loop.run_until_complete(converter.aconvert(
+                ['Chad', 'France'], executor=executor)) == ['TCD', 'FRA']
+        assert converter.cache_info().currsize == 5
+
+        # cancelling the call which started a batch does not cancel the
+        # other calls waiting for the same names
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        gate = threading.Event()
+
+        async def cancel_first():
+            first = loop.create_task(converter.aconvert(
+                ['Peru'], executor=executor))
+            await asyncio.sleep(0)
+            second = loop.create_task(converter.aconvert(
+                ['Peru', 'Chile'], executor=executor))
+            await asyncio.sleep(0)
+            first.cancel()
+            gate.set()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        with ThreadPoolExecutor(1) as executor:
+            executor.submit(gate.wait)
+            assert loop.run_until_complete(cancel_first()) == ['PER', 'CHL']
+    finally:
+        loop.close()
+
+
+def test_match_lists():
+    list_a = ['Norway', 'united_states', 'china', 'taiwan', 'XXXX', 'Norway']
+    list_b = ['USA', 'The Swedish Kingdom', 'Norway is a Kingdom too',
+              'Peoples Republic of China', 'Republic of China', 'USA']
+    matched = coco.match(list_a, list_b, not_found=None)
+    assert matched == {'Norway': 'Norway is a Kingdom too',
+                       'united_states': ['USA', 'USA'],
+                       'china': 'Peoples Republic of China',
+                       'taiwan': 'Republic of China',
+                       'XXXX': 'XXXX'}
+    assert coco.match(['Austria'], ['Germany'], enforce_sublist=True) == {
+        'Austria': ['not_found']}
+
+
+def test_data_table():
+    converter = coco.CountryConverter()
+    assert converter.valid_class == list(converter.data.columns)
+    assert converter.data.ISOnumeric.dtype == float
+    assert converter.convert('AT', to='EU') == 1995
+
+    reduced = converter.data[converter.data.continent == 'Europe']
+    converter.data = reduced
+    assert len(converter.data) == len(reduced)
+    assert converter.convert(['Austria', 'USA'], to='ISO2') == [
+        'AT', 'not found']
+
+
+def test_convert_without_pandas():
+    import subprocess
+    code = ('import sys; import country_converter as coco; '
+            'assert coco.convert("Austria") == "AUT"; '
+            'assert coco.CountryConverter(use_cache=False).convert("NA", '
+            'to="name_short") == "Namibia"; '
+            'assert "pandas" not in sys.modules')
+    subprocess.check_call([sys.executable, '-c', code],
+                          cwd=os.path.join(TESTPATH, '..'))
+
+
+def test_is_member():
+    converter = coco.CountryConverter()
+    assert converter.is_member('Croatia', 'EU', 2013)
+    assert not converter.is_member('Croatia', 'EU', 2012)
+    assert converter.is_member('Austria', 'OECD')
+    assert list(converter.is_member(
+        ['AUT', 'AUT', 'USA', 'XXX'], 'EU', [1990, 1995, 2017, 2017])) == [
+            False, True, False, False]
+    assert list(converter.is_member(['Austria', 'Switzerland'], 'UN',
+                                    2000)) == [True, False]
+    with pytest.raises(KeyError):
+        converter.is_member('Austria', 'NATO')
+    assert len(converter.EU28) == 28
+    assert len(converter.EU27) == 27
+
+
+def test_aggregate():
+    converter = coco.CountryConverter()
+    wide = pd.DataFrame({'2000': [1, 2, 3, 4], '2001': [5, 6, 7, 8]},
+                        index=['Austria', 'Germany', 'China', 'Xland'])
+    result = converter.aggregate(wide, to='continent')
+    assert result.index.name == 'continent'
+    assert result.loc['Europe'].tolist() == [3, 11]
+    assert result.loc['Asia'].tolist() == [3, 7]
+    assert result.loc['not found'].tolist() == [4, 8]
+    result = converter.aggregate(wide['2000'], to='ISO3', not_found=None)
+    assert result['Xland'] == 4
+
+    long = pd.DataFrame({'country': ['AUT', 'DEU', 'CHN', 'AUT'],
+                         'year': [2000, 2000, 2000, 2001],
+                         'value': [1., 2., 3., 4.]})
+    result = converter.aggregate(long, 'country', to='continent',
+                                 src='ISO3', by='year')
+    assert result.index.names == ['continent', 'year']
+    assert result.loc[('Europe', 2000), 'value'] == 3.
+    assert result.loc[('Europe', 2001), 'value'] == 4.
+    result = converter.aggregate(long, 'country', to='continent',
+                                 by='year', agg='max')
+    assert result.loc[('Asia', 2000), 'value'] == 3.
+    assert 'continent' in converter._regions
+
+
+def test_concordance():
+    converter = coco.CountryConverter()
+    conc = converter.concordance('ISO3', 'continent', sparse=False)
+    assert conc.matrix.shape == (len(conc.src_labels), len(conc.to_labels))
+    assert (conc.matrix.sum(axis=1) == 1).all()
+    assert conc.matrix[conc.src_labels.index('AUT'),
+                       conc.to_labels.index('Europe')] == 1
+    assert converter.concordance('ISO3', 'continent', sparse=False) is conc
+    with pytest.raises(ValueError):
+        conc.matrix[0, 0] = 2
+
+    scipy_sparse = pytest.importorskip('scipy.sparse')
+    sparse_conc = converter.concordance('ISO3', 'continent')
+    assert scipy_sparse.issparse(sparse_conc.matrix)
+    assert (sparse_conc.matrix.toarray() == conc.matrix).all()
+
+    converter.data = converter.data[converter.data.ISO3 != 'AUT']
+    assert 'AUT' not in converter.concordance('ISO3', 'continent',
+                                              sparse=False).src_labels
+
+
+def test_overlay():
+    base = coco.CountryConverter()
+    names = ['Congo', 'Wirtland', 'AUT', 'Romania', 'ROU', 'Kinshasa']
+    before = base.convert(names, to='ISO3')
+    overlay = base.overlay(custom_data)
+    full = coco.CountryConverter(additional_data=custom_data,
+                                 use_cache=False)
+    expected = full.convert(names, to='ISO3')
+    assert overlay.convert(names, to='ISO3') == expected
+    assert overlay.convert('Congo', to='name_short') == 'DR Congo'
+    assert base.convert(names, to='ISO3') == before
+    assert base.overlay(custom_data)._get_regex(0) is base._get_regex(0)
+    # patterns only compiled for the overlay are not added to the base
+    assert 'wirtland|virtlando' in overlay._regex_cache
+    assert 'wirtland|virtlando' not in base._regex_cache
+    assert overlay._code_index['ISO3'] == full._get_code_index('ISO3')
+    assert overlay.data.name_short.tolist() == full.data.name_short.tolist()
+
+
+def test_split_exclusions():
+    converter = coco.CountryConverter()
+    assert converter.convert('China excluding Hong Kong') == 'CHN'
+    assert converter.convert('Hong Kong') == 'HKG'
+    split = converter._separate_exclude_cases(
+        'Asia without Japan, excluding South Korea',
+        ['excl\\w.*', 'without', 'w/o'])
+    assert split == {'clean_name': 'Asia ',
+                     'excluded_countries': ['Japan', 'South Korea']}
+
+    result = converter.split_exclusions(
+        ['China excluding Hong Kong', 'Austria', 'China w/o Macau'])
+    assert result == [('CHN', ['HKG']), ('AUT', []), ('CHN', ['MAC'])]
+    assert result[0].name == 'CHN' and result[0].excluded == ['HKG']
+    assert converter.split_exclusions(
+        'China excluding Hong Kong and Macau',
+        to='name_short') == ('China', ['Hong Kong', 'Macao'])
+    assert converter.split_exclusions(
+        'CHN w/o HKG', src='ISO3', exclude_prefix=[' w/o ']) == (
+            'CHN', ['HKG'])
+
+
+def test_stats():
+    converter = coco.CountryConverter()
+    assert converter.stats() is None
+    reports = []
+    converter.enable_stats(callback=reports.append)
+    converter.convert(['Austria', 'AUT', '040', 'Austria', 'Xland'])
+    converter.convert(['Austria', 'France'], to='ISO2')
+    stats = converter.stats(n_patterns=2)
+    assert stats['calls'] == stats['sampled_calls'] == 2
+    assert stats['names'] == 7
+    assert stats['unique_names'] == 6
+    assert stats['cache_hits'] == 1
+    assert stats['src_formats'] == {'regex': 3, 'ISO3': 1, 'ISOnumeric': 1}
+    assert stats['regex_matched'] == 2
+    assert stats['regex_tried'] >= stats['regex_matched']
+    assert len(stats['slowest_patterns']) == 2
+    assert {'prepare', 'exclusion', 'detection', 'regex', 'code',
+            'output'} <= set(stats['stage_time'])
+    assert [report['names'] for report in reports] == [5, 2]
+
+    converter.enable_stats(sample=0)
+    converter.convert('Austria')
+    assert converter.stats()['calls'] == 1
+    assert converter.stats()['sampled_calls'] == 0
+    converter.disable_stats()
+    assert converter.stats() is None
+
+
+def test_diagnostics(caplog):
+    converter = coco.CountryConverter()
+    names = ['Austria', 'Xland', 'Xland', 'Yland', 'Congo', 'Xland']
+    caplog.clear()
+    converted, report = converter.convert(names, diagnostics=True)
+    assert converted == converter.convert(names)
+    assert report['names'] == 6
+    assert report['unique_names'] == 4
+    assert list(report['not_found']) == ['Xland', 'Yland']
+    assert report['not_found']['Xland'] == 'regex'
+    assert report['counts']['not_found'] == 4
+    assert report['counts']['multiple_matches'] == 0
+    warnings = [record for record in caplog.records
+                if record.levelname == 'WARNING']
+    assert len(warnings) == 2
+    assert 'Xland, Yland' in warnings[0].getMessage()
+
+    name_dict, report = coco.match(
+        ['norway', 'Xland', 'Xland'],
+        ['Norway is a kingdom', 'Kingdom of Norway'], diagnostics=True)
+    assert name_dict['Xland'] == 'not_found'
+    assert list(report['not_found_a']) == ['Xland']
+    assert report['counts']['not_found_a'] == 2
+    assert report['multiple_matches_b']['norway'] == (
+        'Norway is a kingdom', 'Kingdom of Norway')
+
+
+def test_fuzzy_matching():
+    converter = coco.CountryConverter()
+    candidates = converter.fuzzy_candidates('Untied Kingdon', limit=3)
+    assert candidates[0][:2] == ('United Kingdom', 'United Kingdom')
+    assert 0 < candidates[0][2] < 1
+    assert len(candidates) == 3
+    assert len(set(cand[0] for cand in candidates)) == 3
+    assert converter.fuzzy_candidates('Zair', to='ISO3')[0][:2] == (
+        'COD', 'zaire')
+
+    names = ['Germny', 'Bangladseh', 'Austria', 'Xland']
+    assert converter.convert(names) == ['not found', 'not found', 'AUT',
+                                        'not found']
+    converted, report = converter.convert(names, fuzzy=0.6,
+                                          diagnostics=True)
+    assert converted == ['DEU', 'BGD', 'AUT', 'not found']
+    assert report['fuzzy_matches']['Germny'][0] == 'Germany'
+    assert list(report['not_found']) == ['Xland']
+    assert converter.convert('Germny', fuzzy=0.99) == 'not found'
+
+
+def test_snapshot(tmpdir):
+    import subprocess
+    import time
+    converter = coco.CountryConverter(additional_data=custom_data)
+    snapshot = converter.freeze()
+    assert snapshot == converter.freeze()
+    assert hash(snapshot) == hash(converter.freeze())
+    assert snapshot != coco.CountryConverter().freeze()
+
+    names = ['Congo', 'Wirtland', 'AUT', '840', 'NA', 'Kingdom of Spain']
+    expected = converter.convert(names, to=['ISO2', 'ISOnumeric'])
+    assert snapshot.converter().convert(
+        names, to=['ISO2', 'ISOnumeric']) == expected
+
+    path = str(tmpdir.join('snapshot.coco'))
+    snapshot.to_file(path)
+    attached = coco.ConverterSnapshot.open_file(path)
+    assert attached == snapshot
+    file_converter = attached.converter()
+    assert file_converter.convert(names, to=['ISO2', 'ISOnumeric']) == (
+        expected)
+    assert file_converter.data.equals(converter.data)
+    name_short = file_converter._table.columns['name_short']
+    assert not name_short.flags.owndata
+    assert not name_short.flags.writeable
+    # columns and code indexes are used from the buffer, not copied
+    assert file_converter.convert(['040', 'UK', 'Chad'], to='ISO3') == [
+        'AUT', 'GBR', 'TCD']
+    assert not isinstance(file_converter._get_column('ISO2'), list)
+    iso3_index = file_converter._code_index['ISO3']
+    assert not isinstance(iso3_index, dict)
+    assert dict(iso3_index) == converter._get_code_index('ISO3')
+
+    shared_memory = pytest.importorskip('multiprocessing.shared_memory')
+    shm = snapshot.to_shared_memory()
+    try:
+        shared = coco.ConverterSnapshot.open_shared_memory(shm.name)
+        assert shared == snapshot
+        assert shared.converter().convert(names, to='ISO3') == (
+            converter.convert(names, to='ISO3'))
+
+        # a process which attached the block does not remove it on exit
+        subprocess.check_call([
+            sys.executable, '-c',
+            'import country_converter as coco; '
+            'snapshot = coco.ConverterSnapshot.open_shared_memory({!r}); '
+            'assert snapshot.converter().convert("AT") == "AUT"'.format(
+                shm.name)], cwd=os.path.join(TESTPATH, '..'))
+        # the resource tracker of the exited process would remove the
+        # block shortly after the exit
+        for _ in range(10):
+            time.sleep(0.05)
+            assert coco.ConverterSnapshot.open_shared_memory(
+                shm.name) == snapshot
+    finally:
+        shm.close()
+        shm.unlink()
+
+    with pytest.raises(ValueError):
+        coco.ConverterSnapshot(b'no snapshot')
+    with pytest.raises(ValueError):
+        coco.ConverterSnapshot(b'COCOSNAP' + (8).to_bytes(8, 'little') +
+                               b'\x80\x04N.    ')
+    with pytest.raises(ValueError):
+        coco.ConverterSnapshot(b'COCOSNAP' + (8).to_bytes(8, 'little') +
+                               b'{"a": 1}')
+
+
+def test_detect_src():
+    converter = coco.CountryConverter()
+    names = ['040', '40', 'aut', 'at', 'UK', 'Chad', 'Iran', '999', 'XXX']
+    assert converter.convert(names, to='ISO3') == [
+        'AUT', 'AUT', 'AUT', 'AUT', 'GBR', 'TCD', 'IRN',
+        'not found', 'not found']
+    assert converter.convert(['040', '4'], src='ISOnumeric',
+                             to='ISO3') == ['AUT', 'AFG']
+    assert converter._get_code_formats()['40'] == (
+        'ISOnumeric', tuple(converter._get_code_index('ISOnumeric')['40']))
+
+
+def test_data_modified_in_place():
+    converter = coco.CountryConverter()
+    assert converter.convert('AUT', to='continent') == 'Europe'
+    converter.data.loc[converter.data.ISO3 == 'AUT', 'continent'] = 'Mars'
+    assert converter.convert('AUT', to='continent') == 'Europe'
+    converter.refresh()
+    assert converter.convert('AUT', to='continent') == 'Mars'
+    assert converter.convert('Austria', to='continent') == 'Mars'
+
+    replaced = converter.data.copy()
+    replaced.loc[replaced.ISO3 == 'FRA', 'continent'] = 'Venus'
+    converter.data = replaced
+    assert converter.data is replaced
+    assert converter.convert(['FRA', 'DEU'], to='continent') == [
+        'Venus', 'Europe']